@@ -1,31 +1,183 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models.functions import Substr
 
+from .documents import rebuild_documents
+from .jobs import enqueue
 from .models import (
     Favorite,
+    Job,
+    MealPlan,
+    MealPlanEntry,
     Recipe,
     Ingredient,
     Subscribe,
     Tag,
     RecipeIngredient,
-    Shopping
+    Shopping,
+    User
 )
+from .pagination import EstimatedCountPaginator
+from .search import search_recipes
+from .stats import recount_authors
 
+SHORT_TEXT_LENGTH = 40
 
-admin.site.register(RecipeIngredient)
-admin.site.register(Subscribe)
-admin.site.register(Shopping)
-admin.site.register(Favorite)
+
+class LargeTableChangeList(ChangeList):
+
+    def get_queryset(self, request):
+        return self.model_admin.get_list_queryset(
+            super().get_queryset(request))
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список без точного COUNT(*) и с выборкой только нужных колонок."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_only = ()
+
+    def get_changelist(self, request, **kwargs):
+        return LargeTableChangeList
+
+    def get_list_queryset(self, queryset):
+        if self.list_only:
+            queryset = queryset.only(*self.list_only)
+        return queryset
+
+
+class AuthorStatsAdmin(admin.ModelAdmin):
+    """Пересчитывает счётчики авторов, затронутых правкой в админке."""
+    stats_author_field = None
+
+    def stats_authors(self, queryset):
+        return set(queryset.values_list(self.stats_author_field, flat=True))
+
+    def save_model(self, request, obj, form, change):
+        authors = (
+            self.stats_authors(self.model.objects.filter(pk=obj.pk))
+            if change else set()
+        )
+        super().save_model(request, obj, form, change)
+        recount_authors(
+            authors | self.stats_authors(self.model.objects.filter(pk=obj.pk)))
+
+    def delete_model(self, request, obj):
+        authors = self.stats_authors(self.model.objects.filter(pk=obj.pk))
+        super().delete_model(request, obj)
+        recount_authors(authors)
+
+    def delete_queryset(self, request, queryset):
+        authors = self.stats_authors(queryset)
+        super().delete_queryset(request, queryset)
+        recount_authors(authors)
+
+
+@admin.register(RecipeIngredient)
+class RecipeIngredientAdmin(LargeTableAdmin):
+    list_display = ('pk', 'recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
+    list_only = (
+        'amount', 'recipe__name', 'ingredient__name',
+        'ingredient__measurement_unit',
+    )
+    raw_id_fields = ('recipe', 'ingredient')
+    search_fields = ('recipe__name', 'ingredient__name')
+
+
+@admin.register(Shopping)
+class UserRecipeAdmin(LargeTableAdmin):
+    list_display = ('pk', 'user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    list_only = ('user__username', 'recipe__name')
+    raw_id_fields = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+
+
+@admin.register(Favorite)
+class FavoriteAdmin(AuthorStatsAdmin, UserRecipeAdmin):
+    stats_author_field = 'recipe__author'
+
+
+@admin.register(Subscribe)
+class SubscribeAdmin(AuthorStatsAdmin, LargeTableAdmin):
+    stats_author_field = 'author'
+
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    list_only = ('user__username', 'author__username')
+    raw_id_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(AuthorStatsAdmin, LargeTableAdmin, BaseUserAdmin):
+    actions = ('delete_in_background',)
+
+    def stats_authors(self, queryset):
+        """Авторы, чьё избранное и подписчиков затронет удаление."""
+        return set(
+            Favorite.objects.filter(user__in=queryset)
+            .values_list('recipe__author', flat=True)
+        ) | set(
+            Subscribe.objects.filter(user__in=queryset)
+            .values_list('author', flat=True)
+        )
+
+    @admin.action(description='Удалить в фоне')
+    def delete_in_background(self, request, queryset):
+        for user_id in queryset.values_list('pk', flat=True):
+            enqueue('delete_user', {'user_id': user_id}, user=request.user)
+        self.message_user(request, 'Удаление поставлено в очередь')
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'name', 'short_text')
+class RecipeAdmin(AuthorStatsAdmin, LargeTableAdmin):
+    stats_author_field = 'author'
+    list_display = ('pk', 'name', 'author', 'short_text')
+    list_select_related = ('author',)
+    raw_id_fields = ('author',)
     search_fields = ('name', 'text')
+    actions = ('delete_in_background',)
+
+    def get_list_queryset(self, queryset):
+        return (
+            queryset.defer('text', 'document', 'search_vector')
+            .annotate(text_start=Substr('text', 1, SHORT_TEXT_LENGTH + 1))
+        )
+
+    @admin.display(description='Текст')
+    def short_text(self, obj):
+        if len(obj.text_start) > SHORT_TEXT_LENGTH:
+            return f"{obj.text_start[:SHORT_TEXT_LENGTH]}..."
+        return obj.text_start
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if change:
+            form.instance.bump_version()
+        rebuild_documents(Recipe.objects.filter(pk=form.instance.pk))
+
+    @admin.action(description='Удалить в фоне')
+    def delete_in_background(self, request, queryset):
+        for recipe_id in queryset.values_list('pk', flat=True):
+            enqueue(
+                'delete_recipe', {'recipe_id': recipe_id}, user=request.user)
+        self.message_user(request, 'Удаление поставлено в очередь')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search_recipes(queryset, search_term), False
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'name', 'measurement_unit')
+    list_display = ('pk', 'name', 'measurement_unit', 'calories')
     search_fields = ('name', 'measurement_unit')
 
 
@@ -34,3 +186,28 @@ class TagAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'color', 'slug')
     search_fields = ('name', 'color')
     prepopulated_fields = {'slug': ('name',)}
+
+
+@admin.register(Job)
+class JobAdmin(LargeTableAdmin):
+    list_display = ('pk', 'name', 'status', 'priority', 'attempts', 'run_at')
+    list_filter = ('status', 'name')
+    list_only = ('name', 'status', 'priority', 'attempts', 'run_at')
+
+
+class MealPlanEntryInline(admin.TabularInline):
+    model = MealPlanEntry
+    raw_id_fields = ('recipe',)
+    extra = 0
+
+
+@admin.register(MealPlan)
+class MealPlanAdmin(LargeTableAdmin):
+    list_display = ('pk', 'name', 'user', 'version')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    inlines = (MealPlanEntryInline,)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        form.instance.bump_version()
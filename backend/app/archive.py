@@ -0,0 +1,41 @@
+"""Перенос старых записей списка покупок в архивную таблицу."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Shopping, ShoppingArchive
+
+BATCH_SIZE = settings.DELETE_CHUNK_SIZE
+
+
+def archive_shopping(days=None, batch_size=BATCH_SIZE):
+    """Переносит покупки старше days дней пачками.
+
+    Каждая пачка копируется и удаляется в своей короткой транзакции,
+    чтобы не держать блокировки на всей таблице.
+    """
+    if days is None:
+        days = settings.SHOPPING_ARCHIVE_DAYS
+    before = timezone.now() - timedelta(days=days)
+    stale = Shopping.objects.filter(created_at__lt=before).order_by('pk')
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                stale.select_for_update()
+                .values_list('pk', 'user_id', 'recipe_id', 'created_at')
+                [:batch_size]
+            )
+            if not rows:
+                return moved
+            ShoppingArchive.objects.bulk_create(
+                ShoppingArchive(
+                    user_id=user_id, recipe_id=recipe_id,
+                    created_at=created_at)
+                for pk, user_id, recipe_id, created_at in rows
+            )
+            Shopping.objects.filter(
+                pk__in=[row[0] for row in rows]).delete()
+        moved += len(rows)
@@ -0,0 +1,39 @@
+"""Каскадное удаление на уровне базы для миграций.
+
+Django создаёт внешние ключи без ON DELETE и удаляет связанные строки
+сам. На PostgreSQL таблицам связей, у которых нет сигналов удаления,
+каскад ставится в базе, чтобы рецепт или пользователь удалялись одним
+DELETE.
+"""
+
+FIND_CONSTRAINTS = '''
+SELECT c.conname, c.confrelid::regclass::text
+FROM pg_constraint c
+JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+WHERE c.contype = 'f' AND c.conrelid = %s::regclass AND a.attname = %s
+'''
+
+
+def set_on_delete(action, fields):
+    """Операция RunPython, меняющая ON DELETE у полей (модель, поле)."""
+    def run(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != 'postgresql':
+            return
+        quote = schema_editor.quote_name
+        for model_name, field_name in fields:
+            model = apps.get_model('app', model_name)
+            table = model._meta.db_table
+            column = model._meta.get_field(field_name).column
+            with connection.cursor() as cursor:
+                cursor.execute(FIND_CONSTRAINTS, [table, column])
+                constraints = cursor.fetchall()
+            for name, target in constraints:
+                schema_editor.execute(
+                    f'ALTER TABLE {quote(table)} '
+                    f'DROP CONSTRAINT {quote(name)}, '
+                    f'ADD CONSTRAINT {quote(name)} '
+                    f'FOREIGN KEY ({quote(column)}) REFERENCES {target} (id) '
+                    f'ON DELETE {action} DEFERRABLE INITIALLY DEFERRED'
+                )
+    return run
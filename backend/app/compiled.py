@@ -0,0 +1,228 @@
+"""Быстрое чтение для сериализаторов без обхода полей DRF на каждую строку.
+
+По набору полей сериализатора один раз собирается обычная функция,
+которая превращает объект модели, строку .values() или готовый документ
+рецепта в словарь. Результат совпадает с to_representation сериализатора.
+"""
+from operator import attrgetter
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.relations import PKOnlyObject
+
+# Поля, to_representation которых не зависит от контекста запроса.
+PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.FloatField,
+    serializers.IntegerField,
+)
+
+_plans = {}
+
+
+def is_compilable(serializer):
+    return (
+        isinstance(serializer, serializers.Serializer)
+        and type(serializer).to_representation
+        is serializers.Serializer.to_representation
+    )
+
+
+def readable_fields(serializer):
+    return [
+        (name, field) for name, field in serializer.fields.items()
+        if not field.write_only
+    ]
+
+
+def signature(serializer):
+    fields = []
+    for name, field in readable_fields(serializer):
+        nested = field.child if isinstance(
+            field, serializers.ListSerializer) else field
+        fields.append((
+            name,
+            type(field),
+            field.source,
+            signature(nested)
+            if isinstance(nested, serializers.Serializer) else None,
+        ))
+    return type(serializer), tuple(fields)
+
+
+def cached(kind, build):
+    def compile(serializer):
+        key = (kind, signature(serializer))
+        if key not in _plans:
+            _plans[key] = build(serializer)
+        plan = _plans[key]
+        return lambda value: plan(value, serializer)
+    return compile
+
+
+def attribute_getter(source_attrs):
+    if not source_attrs:
+        return lambda obj: obj
+    if len(source_attrs) == 1:
+        return attrgetter(source_attrs[0])
+
+    def get(obj):
+        for attr in source_attrs:
+            if obj is None:
+                return None
+            obj = getattr(obj, attr)
+        return obj
+    return get
+
+
+def generic_reader(name):
+    def read(obj, serializer):
+        field = serializer.fields[name]
+        attribute = field.get_attribute(obj)
+        value = (attribute.pk if isinstance(attribute, PKOnlyObject)
+                 else attribute)
+        return None if value is None else field.to_representation(attribute)
+    return read
+
+
+def instance_reader(name, field):
+    if isinstance(field, serializers.SerializerMethodField):
+        method_name = field.method_name
+        return lambda obj, serializer: getattr(
+            serializer, method_name)(obj)
+
+    get = attribute_getter(field.source_attrs)
+    if (isinstance(field, serializers.ListSerializer)
+            and is_compilable(field.child)):
+        child = build_instance_plan(field.child)
+
+        def read(obj, serializer):
+            value = get(obj)
+            if value is None:
+                return None
+            if isinstance(value, models.Manager):
+                value = value.all()
+            nested = serializer.fields[name].child
+            return [child(item, nested) for item in value]
+        return read
+
+    if is_compilable(field):
+        nested_plan = build_instance_plan(field)
+
+        def read(obj, serializer):
+            value = get(obj)
+            if value is None:
+                return None
+            return nested_plan(value, serializer.fields[name])
+        return read
+
+    if isinstance(field, PLAIN_FIELDS):
+        represent = field.to_representation
+
+        def read(obj, serializer):
+            value = get(obj)
+            return None if value is None else represent(value)
+        return read
+
+    return generic_reader(name)
+
+
+def build_instance_plan(serializer):
+    steps = [
+        (name, instance_reader(name, field))
+        for name, field in readable_fields(serializer)
+    ]
+
+    def plan(obj, serializer):
+        return {name: read(obj, serializer) for name, read in steps}
+    return plan
+
+
+def build_row_plan(serializer):
+    steps = []
+    for name, field in readable_fields(serializer):
+        if not isinstance(field, PLAIN_FIELDS):
+            raise TypeError(
+                f'Поле {name} нельзя прочитать из .values()')
+        steps.append(
+            (name, '__'.join(field.source_attrs), field.to_representation))
+
+    def plan(row, serializer):
+        return {
+            name: None if row[key] is None else represent(row[key])
+            for name, key, represent in steps
+        }
+    return plan
+
+
+def document_reader(name, field):
+    if isinstance(field, serializers.ManyRelatedField):
+        def read(document):
+            value = document.get(name)
+            if value is None:
+                return None
+            return [item['id'] if isinstance(item, dict) else item
+                    for item in value]
+        return read
+
+    if isinstance(field, serializers.RelatedField):
+        def read(document):
+            value = document.get(name)
+            return value['id'] if isinstance(value, dict) else value
+        return read
+
+    if isinstance(field, serializers.ListSerializer):
+        child = build_document_plan(field.child)
+
+        def read(document):
+            value = document.get(name)
+            if value is None:
+                return None
+            return [child(item, None) for item in value]
+        return read
+
+    if isinstance(field, serializers.Serializer):
+        nested_plan = build_document_plan(field)
+
+        def read(document):
+            value = document.get(name)
+            return None if value is None else nested_plan(value, None)
+        return read
+
+    return lambda document: document.get(name)
+
+
+def build_document_plan(serializer):
+    steps = [
+        (name, document_reader(name, field))
+        for name, field in readable_fields(serializer)
+    ]
+
+    def plan(document, serializer):
+        return {name: read(document) for name, read in steps}
+    return plan
+
+
+compile_serializer = cached('instance', build_instance_plan)
+compile_rows = cached('row', build_row_plan)
+compile_document = cached('document', build_document_plan)
+
+
+def row_fields(serializer):
+    """Пути полей для .values(), которые ожидает compile_rows."""
+    return [
+        '__'.join(field.source_attrs)
+        for name, field in readable_fields(serializer)
+    ]
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    """ListSerializer, который читает строки собранной функцией."""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        if not is_compilable(self.child):
+            return super().to_representation(data)
+        serialize = compile_serializer(self.child)
+        return [serialize(item) for item in iterable]
@@ -0,0 +1,84 @@
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .models import CatalogVersion
+from .renderers import FastJSONRenderer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CATALOG_KEY = 'catalog:%s:%s'
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encoding):
+    """Лучшее из поддерживаемых сжатий, которое принимает клиент."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def catalog_version(name):
+    version = CatalogVersion.objects.filter(name=name).values_list(
+        'version', flat=True).first()
+    return version or 0
+
+
+def catalog_response(request, name, build):
+    """Отдаёт заранее отрендеренный и сжатый каталог из кэша.
+
+    Ключ кэша включает версию каталога из базы, так что изменение,
+    сделанное в одном процессе, сразу видят все остальные, даже если
+    у каждого процесса свой кэш.
+    """
+    key = CATALOG_KEY % (name, catalog_version(name))
+    entry = cache.get(key)
+    if entry is None:
+        body = FastJSONRenderer().render(build())
+        entry = {None: body}
+        if len(body) >= settings.COMPRESSION_MIN_SIZE:
+            for encoding in available_encodings():
+                entry[encoding] = compress(body, encoding)
+        cache.set(key, entry, settings.CATALOG_CACHE_TIMEOUT)
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding not in entry:
+        encoding = None
+    response = HttpResponse(entry[encoding], content_type='application/json')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def drop_catalog(name):
+    updated = CatalogVersion.objects.filter(name=name).update(
+        version=F('version') + 1)
+    if not updated:
+        CatalogVersion.objects.get_or_create(name=name)
@@ -0,0 +1,94 @@
+"""Удаление рецептов и пользователей с большим числом связей.
+
+На PostgreSQL внешние ключи таблиц связей объявлены с ON DELETE CASCADE
+(миграция 0010), поэтому рецепт удаляется одним DELETE: связи удаляет
+сама база, без сборки графа объектов в памяти. Для очень больших графов
+связи сначала удаляются пачками в отдельных коротких транзакциях.
+В той же транзакции, что и пачка, пересчитываются счётчики затронутых
+авторов, поэтому повтор прерванного удаления их не искажает.
+"""
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import (Favorite, FeedEntry, Recipe, RecipeIngredient, Shopping,
+                     ShoppingArchive, Subscribe, User)
+from .stats import recount_authors
+
+CHUNK_SIZE = settings.DELETE_CHUNK_SIZE
+
+
+def has_db_cascade(using):
+    return connections[using].vendor == 'postgresql'
+
+
+def delete_recipes(queryset):
+    """Удаляет рецепты, на PostgreSQL связи удаляются каскадом в базе."""
+    if not has_db_cascade(queryset.db):
+        return queryset.delete()[0]
+    ids = list(queryset.values_list('pk', flat=True))
+    if not ids:
+        return 0
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {Recipe._meta.db_table} WHERE id = ANY(%s)', [ids])
+        return cursor.rowcount
+
+
+def delete_in_chunks(queryset, chunk_size=CHUNK_SIZE, author_field=None):
+    """Удаляет строки пачками, каждую в своей транзакции.
+
+    author_field указывает путь к автору, чьи счётчики зависят от строк.
+    """
+    model = queryset.model
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        with transaction.atomic(using=queryset.db):
+            chunk = model.objects.filter(pk__in=ids)
+            authors = (
+                set(chunk.values_list(author_field, flat=True))
+                if author_field else ()
+            )
+            deleted += chunk.delete()[0]
+            recount_authors(authors)
+
+
+def delete_recipes_counted(queryset):
+    """Удаляет рецепты и пересчитывает счётчики их авторов."""
+    with transaction.atomic(using=queryset.db):
+        authors = set(queryset.values_list('author', flat=True))
+        deleted = delete_recipes(queryset)
+        recount_authors(authors)
+    return deleted
+
+
+def purge_recipe(recipe_id, chunk_size=CHUNK_SIZE):
+    for queryset, author_field in (
+        (Favorite.objects.filter(recipe_id=recipe_id), 'recipe__author'),
+        (Shopping.objects.filter(recipe_id=recipe_id), None),
+        (ShoppingArchive.objects.filter(recipe_id=recipe_id), None),
+        (FeedEntry.objects.filter(recipe_id=recipe_id), None),
+        (RecipeIngredient.objects.filter(recipe_id=recipe_id), None),
+        (Recipe.tags.through.objects.filter(recipe_id=recipe_id), None),
+    ):
+        delete_in_chunks(queryset, chunk_size, author_field)
+    return delete_recipes_counted(Recipe.objects.filter(pk=recipe_id))
+
+
+def purge_user(user_id, chunk_size=CHUNK_SIZE):
+    for queryset, author_field in (
+        (Favorite.objects.filter(user_id=user_id), 'recipe__author'),
+        (Shopping.objects.filter(user_id=user_id), None),
+        (ShoppingArchive.objects.filter(user_id=user_id), None),
+        (FeedEntry.objects.filter(user_id=user_id), None),
+        (Subscribe.objects.filter(user_id=user_id), 'author'),
+        (Subscribe.objects.filter(author_id=user_id), None),
+    ):
+        delete_in_chunks(queryset, chunk_size, author_field)
+    recipe_ids = Recipe.objects.filter(
+        author_id=user_id).values_list('pk', flat=True)
+    for recipe_id in list(recipe_ids):
+        purge_recipe(recipe_id, chunk_size)
+    return User.objects.filter(pk=user_id).delete()[0]
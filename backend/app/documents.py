@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Recipe
+from .nutrition import NUTRIENTS, set_nutrition
+
+BATCH_SIZE = 500
+
+
+def build_document(recipe):
+    from .serializers import RecipeSerializer
+
+    return RecipeSerializer().to_document(recipe)
+
+
+def rebuild_documents(queryset=None, batch_size=BATCH_SIZE):
+    """Пересобирает документы и пищевую ценность рецептов пачками."""
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    ids = list(queryset.order_by().values_list('id', flat=True).distinct())
+    rebuilt = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        recipes = (
+            Recipe.objects.filter(id__in=batch)
+            .select_related('author')
+            .prefetch_related('tags', 'ingredients_in__ingredient')
+        )
+        with transaction.atomic():
+            now = timezone.now()
+            for recipe in recipes:
+                recipe.updated_at = now
+                set_nutrition(recipe)
+                recipe.document = build_document(recipe)
+            Recipe.objects.bulk_update(
+                recipes, ['document', 'updated_at', *NUTRIENTS])
+        rebuilt += len(batch)
+    return rebuilt
+
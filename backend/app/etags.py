@@ -0,0 +1,89 @@
+"""ETag по версиям строк, а не по хэшу готового ответа.
+
+Состояние собирается одним запросом .values_list() по тем же фильтрам,
+что и ответ: версии строк, персональные флаги и параметры страницы.
+Если клиент прислал совпадающий If-None-Match, сериализация не запускается.
+
+ETag версионированного объекта начинается с его версии: "<версия>-<хэш>".
+Такой тег или просто "<версия>" можно прислать в If-Match при изменении.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_etags
+
+
+def make_etag(request, state, version=None):
+    key = repr((
+        request.user.pk,
+        request.get_full_path(),
+        request.accepted_renderer.format,
+        state,
+    ))
+    digest = hashlib.md5(key.encode()).hexdigest()
+    if version is None:
+        return '"%s"' % digest
+    return '"%s-%s"' % (version, digest)
+
+
+def version_etag(version):
+    return '"%s"' % version
+
+
+def if_match_versions(request):
+    """Версии из If-Match или None, если заголовка нет или он равен *."""
+    header = request.META.get('HTTP_IF_MATCH')
+    if header is None:
+        return None
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return None
+    versions = set()
+    for etag in etags:
+        if etag.startswith('W/'):
+            etag = etag[2:]
+        version = etag.strip('"').split('-')[0]
+        if version.isdigit():
+            versions.add(int(version))
+    return versions
+
+
+def rows_state(queryset, *fields):
+    """Поля строк вместе со всеми аннотациями queryset."""
+    return list(queryset.values_list(*fields, *queryset.query.annotations))
+
+
+def page_state(view, queryset, *fields):
+    """Состояние только той страницы, которую получит клиент."""
+    rows = queryset.values_list(*fields, *queryset.query.annotations)
+    page = view.paginate_queryset(rows)
+    if page is None:
+        return list(rows)
+    return view.paginator.page.paginator.count, list(page)
+
+
+def etag_condition(state_method, versioned=False):
+    """Отвечает 304 на If-None-Match, если состояние строк не изменилось.
+
+    При versioned=True метод состояния возвращает пару (версия, состояние).
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            state = getattr(self, state_method)(request, *args, **kwargs)
+            if state is None:
+                return method(self, request, *args, **kwargs)
+            version = None
+            if versioned:
+                version, state = state
+            etag = make_etag(request, state, version)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                patch_vary_headers(response, ('Authorization',))
+            return response
+        return wrapper
+    return decorator
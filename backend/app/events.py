@@ -0,0 +1,163 @@
+"""События пользователя для потока /api/events/.
+
+Брокер задаётся настройкой EVENTS_BROKER, без неё на PostgreSQL
+выбирается PostgresBroker, на других базах InProcessBroker.
+PostgresBroker передаёт
+события через LISTEN/NOTIFY основной базы, поэтому их получают все
+процессы потока событий, какой бы воркер API их ни отправил.
+InProcessBroker доставляет события только в пределах одного процесса
+и подходит для разработки, когда API и поток обслуживает один
+ASGI-процесс.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+TICKET_SALT = 'app.events.ticket'
+
+
+class InProcessBroker:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queues = {}
+
+    def publish(self, user_id, event):
+        """Можно вызывать из любого потока, в том числе из sync view."""
+        with self.lock:
+            targets = list(self.queues.get(user_id, {}).items())
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                self.unsubscribe(user_id, queue)
+
+    def subscribe(self, user_id):
+        """Очередь событий пользователя в текущем цикле asyncio."""
+        queue = asyncio.Queue()
+        with self.lock:
+            self.queues.setdefault(user_id, {})[queue] = (
+                asyncio.get_running_loop())
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self.lock:
+            queues = self.queues.get(user_id, {})
+            queues.pop(queue, None)
+            if not queues:
+                self.queues.pop(user_id, None)
+
+
+class PostgresBroker(InProcessBroker):
+    """События через канал NOTIFY основной базы.
+
+    publish отправляет NOTIFY на соединении Django, поэтому событие из
+    транзакции уходит только после её фиксации. Процесс потока держит
+    одно отдельное соединение с LISTEN и раздаёт полученные события
+    своим подписчикам.
+    """
+    channel = 'foodgram_events'
+    reconnect_delay = 5
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+        self.started = False
+
+    def publish(self, user_id, event):
+        payload = json.dumps({'user': user_id, 'event': event})
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def subscribe(self, user_id):
+        queue = super().subscribe(user_id)
+        if not self.started:
+            self.started = True
+            self.listen(asyncio.get_running_loop())
+        return queue
+
+    def listen(self, loop):
+        import psycopg2
+
+        try:
+            listener = psycopg2.connect(
+                **connections['default'].get_connection_params())
+            listener.autocommit = True
+            with listener.cursor() as cursor:
+                cursor.execute(f'LISTEN {self.channel}')
+        except psycopg2.Error:
+            logger.exception('Не удалось подключиться к каналу событий')
+            loop.call_later(self.reconnect_delay, self.listen, loop)
+            return
+        self.listener = listener
+        loop.add_reader(listener.fileno(), self.receive, loop)
+
+    def receive(self, loop):
+        import psycopg2
+
+        try:
+            self.listener.poll()
+        except psycopg2.Error:
+            logger.exception('Соединение с каналом событий потеряно')
+            loop.remove_reader(self.listener.fileno())
+            self.listener.close()
+            self.listener = None
+            loop.call_later(self.reconnect_delay, self.listen, loop)
+            return
+        while self.listener.notifies:
+            message = json.loads(self.listener.notifies.pop(0).payload)
+            super().publish(message['user'], message['event'])
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        path = settings.EVENTS_BROKER
+        if not path:
+            path = ('app.events.PostgresBroker'
+                    if connections['default'].vendor == 'postgresql'
+                    else 'app.events.InProcessBroker')
+        _broker = import_string(path)()
+    return _broker
+
+
+def send(user_id, event):
+    try:
+        get_broker().publish(user_id, event)
+    except Exception:
+        logger.exception('Не удалось отправить событие %s', event['type'])
+
+
+def publish(user, event_type, **data):
+    """Отправляет событие после фиксации текущей транзакции.
+
+    Ошибка брокера только пишется в лог и не ломает запрос, который
+    уже изменил данные.
+    """
+    event = {'type': event_type, **data}
+    transaction.on_commit(lambda: send(user.id, event))
+
+
+def make_ticket(user):
+    """Короткоживущий подписанный билет для подключения EventSource."""
+    return signing.dumps(user.id, salt=TICKET_SALT)
+
+
+def read_ticket(ticket):
+    """id пользователя из билета или None, если билет подделан или истёк."""
+    try:
+        return signing.loads(
+            ticket, salt=TICKET_SALT, max_age=settings.EVENTS_TICKET_MAX_AGE)
+    except signing.BadSignature:
+        return None
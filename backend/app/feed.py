@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .jobs import enqueue
+from .models import AuthorStats, FeedEntry, HeavyAuthor, Recipe, Subscribe
+
+FANOUT_LIMIT = settings.FEED_FANOUT_LIMIT
+# Автор возвращается к раздаче при записи, только опустившись заметно
+# ниже порога, чтобы подписки и отписки у границы не гоняли дозаполнение.
+LIGHT_LIMIT = FANOUT_LIMIT * 9 // 10
+BACKFILL_SIZE = settings.FEED_BACKFILL_SIZE
+BATCH_SIZE = 1000
+
+
+def is_heavy_author(author_id):
+    """Рецепты авторов с большим числом подписчиков читаются при запросе."""
+    return HeavyAuthor.objects.filter(author_id=author_id).exists()
+
+
+def heavy_authors(user):
+    return Subscribe.objects.filter(
+        user=user, author__feed_heavy__isnull=False).values('author')
+
+
+def fan_out_recipe(recipe):
+    if is_heavy_author(recipe.author_id):
+        return
+    subscribers = Subscribe.objects.filter(
+        author=recipe.author_id).values_list('user', flat=True)
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, recipe=recipe)
+         for user_id in subscribers.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill_feed(user, author):
+    if is_heavy_author(author.id):
+        return
+    recipes = Recipe.objects.filter(author=author).values_list(
+        'id', flat=True)[:BACKFILL_SIZE]
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user=user, recipe_id=recipe_id) for recipe_id in recipes),
+        ignore_conflicts=True
+    )
+
+
+def backfill_followers(author_id, after=0):
+    """Раздаёт последние рецепты автора всем его подписчикам.
+
+    Возвращает наибольший id разданного рецепта.
+    """
+    recipes = list(
+        Recipe.objects.filter(author_id=author_id, id__gt=after)
+        .values_list('id', flat=True)[:BACKFILL_SIZE]
+    )
+    if not recipes:
+        return after
+    subscribers = Subscribe.objects.filter(
+        author=author_id).values_list('user', flat=True)
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, recipe_id=recipe_id)
+         for user_id in subscribers.iterator() for recipe_id in recipes),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    return max(recipes)
+
+
+def make_light(author_id):
+    """Возвращает автора к раздаче при записи и дозаполняет ленты.
+
+    Отметка снимается в одной транзакции с дозаполнением, поэтому
+    читатели до её завершения получают рецепты автора при запросе.
+    Второй проход раздаёт рецепты, сохранённые во время первого.
+    """
+    with transaction.atomic():
+        if not HeavyAuthor.objects.filter(author_id=author_id).delete()[0]:
+            return False
+        last = backfill_followers(author_id)
+    backfill_followers(author_id, after=last)
+    return True
+
+
+def update_author_mode(author_id):
+    """Переключает автора по числу подписчиков из его статистики."""
+    followers = AuthorStats.objects.filter(author_id=author_id).values_list(
+        'followers_count', flat=True).first() or 0
+    if followers > FANOUT_LIMIT:
+        HeavyAuthor.objects.get_or_create(author_id=author_id)
+    elif followers < LIGHT_LIMIT and is_heavy_author(author_id):
+        enqueue('make_author_light', {'author_id': author_id})
+
+
+def sync_author_modes():
+    """Сверяет отметки всех авторов со статистикой подписчиков."""
+    heavy = AuthorStats.objects.filter(
+        followers_count__gt=FANOUT_LIMIT, author__feed_heavy__isnull=True)
+    HeavyAuthor.objects.bulk_create(
+        (HeavyAuthor(author_id=author_id)
+         for author_id in heavy.values_list('author_id', flat=True)),
+        ignore_conflicts=True
+    )
+    light = HeavyAuthor.objects.exclude(
+        author__stats__followers_count__gte=LIGHT_LIMIT)
+    for author_id in light.values_list('author_id', flat=True):
+        enqueue('make_author_light', {'author_id': author_id})
+
+
+def drop_author(user, author):
+    FeedEntry.objects.filter(user=user, recipe__author=author).delete()
+
+
+def feed_queryset(queryset, user):
+    entries = FeedEntry.objects.filter(user=user).values('recipe')
+    return queryset.filter(
+        Q(id__in=entries) | Q(author__in=heavy_authors(user)))
@@ -1,15 +1,13 @@
 import base64
-import imghdr
 import uuid
 
-import six
 from django.core.files.base import ContentFile
 from rest_framework import serializers
 
 
 class Base64ImageField(serializers.ImageField):
     def to_internal_value(self, data):
-        if isinstance(data, six.string_types):
+        if isinstance(data, str):
             if 'data:' in data and ';base64,' in data:
                 header, data = data.split(';base64,')
 
@@ -25,6 +23,26 @@ class Base64ImageField(serializers.ImageField):
         return super(Base64ImageField, self).to_internal_value(data)
 
     def get_file_extension(self, file_name, decoded_file):
+        # Определение формата нужно только при загрузке картинки,
+        # поэтому модуль не загружается при запуске воркеров.
+        import imghdr
+
         extension = imghdr.what(file_name, decoded_file)
         extension = 'jpg' if extension == 'jpeg' else extension
         return extension
+
+
+class AuthorStatsField(serializers.Field):
+    """Счётчик из AuthorStats пользователя, 0 если записи ещё нет."""
+
+    def __init__(self, stat, **kwargs):
+        kwargs.setdefault('source', '*')
+        kwargs['read_only'] = True
+        self.stat = stat
+        super().__init__(**kwargs)
+
+    def to_representation(self, user):
+        stats = getattr(user, 'stats', None)
+        if stats is None:
+            return None if self.stat == 'average_cooking_time' else 0
+        return getattr(stats, self.stat)
@@ -1,6 +1,7 @@
 from django_filters import rest_framework as django_filters
 
 from .models import Recipe
+from .search import search_recipes
 
 
 class RecipeFilter(django_filters.FilterSet):
@@ -14,10 +15,20 @@ class RecipeFilter(django_filters.FilterSet):
     is_in_shopping_cart = django_filters.CharFilter(
         method='filter_in_shopping_cart'
     )
+    search = django_filters.CharFilter(
+        method='filter_search'
+    )
+    calories = django_filters.RangeFilter()
+    proteins = django_filters.RangeFilter()
+    fats = django_filters.RangeFilter()
+    carbohydrates = django_filters.RangeFilter()
 
     class Meta:
         model = Recipe
-        fields = ('author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'author', 'is_favorited', 'is_in_shopping_cart', 'search',
+            'calories', 'proteins', 'fats', 'carbohydrates'
+        )
 
     @property
     def qs(self):
@@ -35,6 +46,11 @@ class RecipeFilter(django_filters.FilterSet):
             return queryset.filter(id__in=ids)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        if value.strip():
+            return search_recipes(queryset, value)
+        return queryset
+
     def filter_in_shopping_cart(self, queryset, name, value):
         if (value != 'false' and value != '0'
             and not self.request.user.is_anonymous):
@@ -0,0 +1,73 @@
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+registry = {}
+
+RETRY_DELAY = 10
+STALE_AFTER = timedelta(minutes=30)
+
+
+def task(name):
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, user=None, priority=0, max_attempts=3):
+    if name not in registry:
+        raise KeyError(f'Неизвестная задача: {name}')
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        user=user,
+        priority=priority,
+        max_attempts=max_attempts
+    )
+
+
+def claim():
+    """Забирает следующую задачу, не блокируясь на чужих."""
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_at__lte=timezone.now())
+            .order_by('-priority', 'run_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.save(update_fields=('status', 'attempts', 'updated'))
+    return job
+
+
+def run(job):
+    try:
+        job.result = registry[job.name](**job.payload)
+        job.status = Job.DONE
+        job.error = ''
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            job.status = Job.FAILED
+    job.save(update_fields=('result', 'status', 'error', 'run_at', 'updated'))
+    return job
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи упавших воркеров."""
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        updated__lt=timezone.now() - STALE_AFTER
+    ).update(status=Job.QUEUED)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from app.archive import BATCH_SIZE, archive_shopping
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые записи списка покупок в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Архивировать записи старше этого числа дней'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество записей в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        moved = archive_shopping(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Перенесено записей: {moved}'))
@@ -0,0 +1,75 @@
+import base64
+import io
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from app.models import Recipe
+from app.parsers import FastJSONParser
+from app.renderers import FastJSONRenderer, orjson
+from app.serializers import RecipeSerializer
+
+# Числа, которые orjson и json записывают по-разному.
+FLOAT_SAMPLES = [0.1, 1 / 3, 1e-05, 2.5e-07, 1e16, 123456789.125, -0.0]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает скорость стандартного и быстрого JSON на '
+            'сериализованных рецептах из базы')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson не установлен')
+        recipes = list(Recipe.objects.all()[:options['recipes']])
+        if not recipes:
+            raise CommandError('В базе нет рецептов')
+        data = RecipeSerializer(recipes, many=True).data
+        repeat = options['repeat']
+
+        default, fast = JSONRenderer(), FastJSONRenderer()
+        body = default.render(data)
+        for sample in (data, {'floats': FLOAT_SAMPLES}):
+            if fast.render(sample) != default.render(sample):
+                raise CommandError('Результаты рендереров отличаются')
+        try:
+            fast.render({'value': float('nan')})
+        except ValueError:
+            pass
+        else:
+            raise CommandError('NaN должен вызывать ошибку, как в json')
+        self.report(
+            f'render {len(recipes)} рецептов, {len(body)} байт',
+            lambda: default.render(data),
+            lambda: fast.render(data),
+            repeat
+        )
+
+        image = recipes[0].image
+        with image.open('rb') as file:
+            encoded = base64.b64encode(file.read()).decode()
+        post = default.render({
+            'name': recipes[0].name,
+            'text': recipes[0].text,
+            'image': f'data:image/jpeg;base64,{encoded}',
+        })
+        self.report(
+            f'parse POST с картинкой, {len(post)} байт',
+            lambda: JSONParser().parse(io.BytesIO(post)),
+            lambda: FastJSONParser().parse(io.BytesIO(post)),
+            repeat
+        )
+
+    def report(self, title, default, fast, repeat):
+        default_time = timeit.timeit(default, number=repeat) / repeat
+        fast_time = timeit.timeit(fast, number=repeat) / repeat
+        self.stdout.write(
+            f'{title}: json {default_time * 1000:.3f} мс, '
+            f'orjson {fast_time * 1000:.3f} мс, '
+            f'ускорение x{default_time / fast_time:.1f}'
+        )
@@ -0,0 +1,74 @@
+import copy
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from app.compiled import compile_rows, compile_serializer, row_fields
+from app.models import Ingredient, Recipe, Tag
+from app.serializers import (IngredientSerializer, RecipeSerializer,
+                             TagSerializer)
+
+
+class Command(BaseCommand):
+    help = ('Проверяет, что собранные функции чтения отдают то же, что '
+            'сериализаторы DRF, и сравнивает их скорость')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        limit, repeat = options['limit'], options['repeat']
+        for model, serializer_class in (
+                (Tag, TagSerializer), (Ingredient, IngredientSerializer)):
+            objects = list(model.objects.all()[:limit])
+            serializer = serializer_class()
+            rows = list(model.objects.values(
+                *row_fields(serializer))[:limit])
+            drf = self.drf_list(serializer_class, objects)
+            serialize = compile_serializer(serializer)
+            from_rows = compile_rows(serializer)
+            self.check_parity(model, drf, [serialize(obj) for obj in objects])
+            self.check_parity(model, drf, [from_rows(row) for row in rows])
+            self.report(model, len(objects), repeat, {
+                'DRF': lambda: self.drf_list(serializer_class, objects),
+                'instances': lambda: [serialize(obj) for obj in objects],
+                'values()': lambda: [from_rows(row) for row in rows],
+            })
+
+        recipes = list(
+            Recipe.objects.select_related('author')
+            .prefetch_related('tags', 'ingredients_in__ingredient')[:limit]
+        )
+        plain = copy.copy(recipes)
+        for index, recipe in enumerate(plain):
+            plain[index] = copy.copy(recipe)
+            plain[index].document = {}
+        drf = RecipeSerializer(plain, many=True).data
+        self.check_parity(
+            Recipe, drf, RecipeSerializer(recipes, many=True).data)
+        self.report(Recipe, len(recipes), repeat, {
+            'DRF': lambda: RecipeSerializer(plain, many=True).data,
+            'documents': lambda: RecipeSerializer(recipes, many=True).data,
+        })
+
+    def drf_list(self, serializer_class, objects):
+        return serializers.ListSerializer(
+            child=serializer_class()).to_representation(objects)
+
+    def check_parity(self, model, expected, actual):
+        if expected != actual:
+            raise CommandError(
+                f'{model.__name__}: результат отличается от DRF')
+
+    def report(self, model, count, repeat, variants):
+        timings = {
+            name: timeit.timeit(func, number=repeat) / repeat
+            for name, func in variants.items()
+        }
+        base = timings['DRF']
+        self.stdout.write(f'{model.__name__}, {count} объектов:')
+        for name, elapsed in timings.items():
+            self.stdout.write(
+                f'  {name}: {elapsed * 1000:.2f} мс, x{base / elapsed:.1f}')
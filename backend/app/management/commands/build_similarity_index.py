@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from app.similarity import BLOCK_SIZE, build_index
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает похожие рецепты для всех рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Сколько соседей хранить для рецепта'
+        )
+        parser.add_argument(
+            '--block-size', type=int, default=BLOCK_SIZE,
+            help='Количество рецептов в одном блоке вычислений'
+        )
+
+    def handle(self, *args, **options):
+        built = build_index(options['limit'], options['block_size'])
+        self.stdout.write(self.style.SUCCESS(f'Обработано рецептов: {built}'))
@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from app.transfer import BATCH_SIZE, export_recipes
+
+
+class Command(BaseCommand):
+    help = 'Выгружает рецепты в формате JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки, по умолчанию стандартный вывод'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество рецептов, читаемых за один запрос'
+        )
+
+    def handle(self, *args, **options):
+        if options['output'] == '-':
+            exported = export_recipes(sys.stdout, options['batch_size'])
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                exported = export_recipes(output, options['batch_size'])
+        self.stderr.write(
+            self.style.SUCCESS(f'Выгружено рецептов: {exported}'))
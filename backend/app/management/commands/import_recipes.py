@@ -0,0 +1,39 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from app.transfer import BATCH_SIZE, Importer
+
+
+class Command(BaseCommand):
+    help = 'Загружает рецепты из файла JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл с рецептами, - для стандартного ввода'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=BATCH_SIZE,
+            help='Количество рецептов в одной транзакции'
+        )
+        parser.add_argument(
+            '--id-map',
+            help='Куда записать соответствие старых и новых id рецептов'
+        )
+
+    def handle(self, *args, **options):
+        importer = Importer(options['chunk_size'])
+        if options['path'] == '-':
+            importer.run(sys.stdin)
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                importer.run(lines)
+        if options['id_map']:
+            with open(options['id_map'], 'w', encoding='utf-8') as output:
+                json.dump(importer.ids, output)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено рецептов: {importer.imported}, '
+            f'пропущено рецептов: {importer.skipped_recipes}, '
+            f'пропущено тегов: {importer.skipped_tags}'))
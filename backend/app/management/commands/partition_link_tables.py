@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from app.partitioning import PARTITIONED_MODELS, is_partitioned, partition_sql
+
+
+class Command(BaseCommand):
+    help = (
+        'Секционирует избранное, покупки и подписки по хешу user_id '
+        '(PostgreSQL). Без --execute только выводит SQL'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--partitions', type=int, default=8,
+            help='Количество секций'
+        )
+        parser.add_argument(
+            '--execute', action='store_true',
+            help='Выполнить SQL вместо вывода'
+        )
+
+    def handle(self, *args, **options):
+        if options['partitions'] < 2:
+            raise CommandError('Нужно не меньше двух секций')
+        if connection.vendor != 'postgresql':
+            raise CommandError('Секционирование доступно только на PostgreSQL')
+        for model in PARTITIONED_MODELS:
+            table = model._meta.db_table
+            if is_partitioned(model):
+                self.stderr.write(f'{table} уже секционирована, пропущена')
+                continue
+            statements = partition_sql(model, options['partitions'])
+            if not options['execute']:
+                self.stdout.write(f'-- {table}\nBEGIN;')
+                for statement in statements:
+                    self.stdout.write(f'{statement};')
+                self.stdout.write('COMMIT;\n')
+                continue
+            with transaction.atomic(), connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+            self.stdout.write(self.style.SUCCESS(f'{table} секционирована'))
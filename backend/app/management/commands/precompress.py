@@ -0,0 +1,53 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.compression import compress
+
+EXTENSIONS = ('.css', '.js', '.html', '.json', '.svg', '.txt', '.yml',
+              '.yaml', '.map', '.xml')
+
+
+class Command(BaseCommand):
+    help = 'Сжимает текстовые файлы рядом с оригиналами для gzip_static'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Каталоги или файлы, по умолчанию STATIC_ROOT'
+        )
+        parser.add_argument(
+            '--min-size', type=int, default=settings.COMPRESSION_MIN_SIZE,
+            help='Файлы меньше этого размера не сжимаются'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or [settings.STATIC_ROOT]
+        written = 0
+        for path in paths:
+            for filename in self.files(path):
+                written += self.precompress(filename, options['min_size'])
+        self.stdout.write(self.style.SUCCESS(f'Сжато файлов: {written}'))
+
+    def files(self, path):
+        if os.path.isfile(path):
+            yield path
+            return
+        for root, _, names in os.walk(path):
+            for name in names:
+                yield os.path.join(root, name)
+
+    def precompress(self, filename, min_size):
+        if not filename.endswith(EXTENSIONS):
+            return 0
+        with open(filename, 'rb') as source:
+            body = source.read()
+        if len(body) < min_size:
+            return 0
+        compressed = compress(body, 'gzip')
+        if len(compressed) >= len(body):
+            return 0
+        with open(filename + '.gz', 'wb') as target:
+            target.write(compressed)
+        return 1
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# То же, что делает воркер gunicorn до первого запроса.
+BOOT = (
+    'from foodgram.wsgi import application; '
+    'from django.urls import get_resolver; '
+    'get_resolver().url_patterns'
+)
+
+
+class Command(BaseCommand):
+    help = 'Показывает самые медленные импорты при запуске приложения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Сколько модулей показать'
+        )
+        parser.add_argument(
+            '--sort', choices=('self', 'cumulative'), default='cumulative',
+            help='Время самого модуля или вместе с его импортами'
+        )
+        parser.add_argument(
+            '--code', default=BOOT,
+            help='Код, импорты которого измеряются'
+        )
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', options['code']],
+            cwd=settings.BASE_DIR,
+            env=dict(os.environ),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+        imports = self.parse(result.stderr)
+        column = 0 if options['sort'] == 'self' else 1
+        imports.sort(key=lambda row: row[column], reverse=True)
+        total = sum(row[0] for row in imports)
+        self.stdout.write(f'{"self, мс":>10} {"всего, мс":>10}  модуль')
+        for own, cumulative, name in imports[:options['limit']]:
+            self.stdout.write(
+                f'{own / 1000:10.1f} {cumulative / 1000:10.1f}  {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Модулей: {len(imports)}, суммарно {total / 1000:.0f} мс'))
+
+    def parse(self, output):
+        imports = []
+        for line in output.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            own, cumulative, name = line[len('import time:'):].split('|')
+            imports.append((int(own), int(cumulative), name.strip()))
+        return imports
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from app.feed import sync_author_modes
+from app.stats import BATCH_SIZE, rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику всех авторов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество записей в одном INSERT'
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_stats(options['batch_size'])
+        sync_author_modes()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано авторов: {rebuilt}'))
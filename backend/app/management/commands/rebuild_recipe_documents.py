@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from app.documents import BATCH_SIZE, rebuild_documents
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает готовые документы всех рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество рецептов в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_documents(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересобрано документов: {rebuilt}'))
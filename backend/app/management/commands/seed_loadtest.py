@@ -0,0 +1,160 @@
+import json
+import random
+import secrets
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from app.feed import backfill_feed, sync_author_modes
+from app.models import Favorite, Ingredient, Recipe, Subscribe, Tag, User
+from app.stats import rebuild_stats
+from app.transfer import Importer
+
+USERNAME = 'loadtest_%d'
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу пользователями и рецептами для нагрузочного '
+        'тестирования и выводит их токены и пароль в JSON для '
+        'python -m loadtest. Без DEBUG запускается только с '
+        '--i-know-this-is-not-production'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument(
+            '--recipes', type=int, default=500,
+            help='Сколько рецептов создать всего'
+        )
+        parser.add_argument(
+            '--subscriptions', type=int, default=5,
+            help='Подписок на пользователя'
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=10,
+            help='Рецептов в избранном у пользователя'
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--output', default=None,
+            help='Файл для JSON, по умолчанию stdout'
+        )
+        parser.add_argument(
+            '--i-know-this-is-not-production', action='store_true',
+            dest='not_production',
+            help='Разрешить запуск без DEBUG, например на временной базе'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['not_production']:
+            raise CommandError(
+                'Команда создаёт пользователей с известными токенами. '
+                'Без DEBUG укажите --i-know-this-is-not-production')
+        rng = random.Random(options['seed'])
+        password = secrets.token_urlsafe(16)
+        if not Ingredient.objects.exists():
+            call_command(
+                'loaddata', settings.BASE_DIR / 'ingredients.json',
+                verbosity=0)
+        for name, color, slug in TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color})
+        users = self.create_users(options['users'], password)
+        recipes = self.create_recipes(rng, users, options['recipes'])
+        self.create_links(rng, users, recipes, options)
+        data = {
+            'tokens': [
+                Token.objects.get_or_create(user=user)[0].key
+                for user in users
+            ],
+            'users': [user.pk for user in users],
+            'password': password,
+            'recipes': recipes,
+            'tags': [slug for name, color, slug in TAGS],
+            'ingredients': list(
+                Ingredient.objects.values_list('pk', flat=True)[:200]),
+        }
+        if options['output'] is None:
+            self.stdout.write(json.dumps(data))
+            return
+        with open(options['output'], 'w') as output:
+            json.dump(data, output)
+        self.stderr.write(self.style.SUCCESS(
+            f'Пользователей: {len(users)}, рецептов: {len(recipes)}'))
+
+    def create_users(self, count, password):
+        names = [USERNAME % number for number in range(count)]
+        existing = set(User.objects.filter(
+            username__in=names).values_list('username', flat=True))
+        password = make_password(password)
+        User.objects.filter(username__in=existing).update(password=password)
+        User.objects.bulk_create(
+            User(
+                username=name, email=f'{name}@example.com',
+                first_name='Нагрузка', last_name=name, password=password)
+            for name in names if name not in existing
+        )
+        return list(User.objects.filter(username__in=names).order_by('pk'))
+
+    def create_recipes(self, rng, users, count):
+        authors = {user.pk: user.username for user in users}
+        recipes = list(Recipe.objects.filter(
+            author__in=authors).values_list('pk', flat=True))
+        missing = count - len(recipes)
+        if missing <= 0:
+            return recipes[:count]
+        ingredients = list(
+            Ingredient.objects.values_list('name', 'measurement_unit'))
+        slugs = [slug for name, color, slug in TAGS]
+        lines = (
+            json.dumps({
+                'id': number,
+                'author': rng.choice(list(authors.values())),
+                'name': f'Рецепт {number}',
+                'text': 'Смешать ингредиенты и готовить до готовности. ' * 5,
+                'cooking_time': rng.randint(5, 120),
+                'image': 'recipes/images/loadtest.png',
+                'tags': rng.sample(slugs, rng.randint(1, len(slugs))),
+                'ingredients': [
+                    {'name': name, 'measurement_unit': unit,
+                     'amount': rng.randint(1, 500)}
+                    for name, unit in rng.sample(
+                        ingredients, rng.randint(3, 8))
+                ],
+            }, ensure_ascii=False)
+            for number in range(missing)
+        )
+        importer = Importer()
+        importer.run(lines)
+        return recipes + list(importer.ids.values())
+
+    def create_links(self, rng, users, recipes, options):
+        for user in users:
+            authors = rng.sample(
+                users, min(options['subscriptions'], len(users)))
+            for author in authors:
+                if author == user:
+                    continue
+                _, created = Subscribe.objects.get_or_create(
+                    user=user, author=author)
+                if created:
+                    backfill_feed(user, author)
+            Favorite.objects.bulk_create(
+                (
+                    Favorite(user=user, recipe_id=recipe_id)
+                    for recipe_id in rng.sample(
+                        recipes, min(options['favorites'], len(recipes)))
+                ),
+                ignore_conflicts=True
+            )
+        rebuild_stats()
+        sync_author_modes()
@@ -0,0 +1,17 @@
+from django.db.models import Count, F
+
+
+def match_recipes(queryset, ingredient_ids, missing=0):
+    """Рецепты, для которых не хватает не больше missing ингредиентов.
+
+    Сначала идут полностью покрытые рецепты, затем рецепты с наибольшим
+    числом совпадений. Совпадения считаются по индексу
+    (ingredient, recipe), а общее число ингредиентов хранится в рецепте.
+    """
+    return (
+        queryset.filter(ingredients_in__ingredient__in=ingredient_ids)
+        .annotate(matched=Count('ingredients_in', distinct=True))
+        .annotate(missing=F('ingredients_count') - F('matched'))
+        .filter(missing__lte=missing)
+        .order_by('missing', '-matched', '-id')
+    )
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='document',
+            field=models.JSONField(default=dict, editable=False, help_text='Готовое представление рецепта для чтения', verbose_name='Документ'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:26
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_TRIGGER = '''
+CREATE FUNCTION app_recipe_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.russian', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector('pg_catalog.russian', coalesce(NEW.text, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER app_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, text ON app_recipe
+    FOR EACH ROW EXECUTE PROCEDURE app_recipe_search_vector_update();
+
+UPDATE app_recipe SET name = name;
+
+CREATE INDEX app_recipe_search_vector_gin
+    ON app_recipe USING gin (search_vector);
+'''
+
+DROP_SEARCH_TRIGGER = '''
+DROP INDEX IF EXISTS app_recipe_search_vector_gin;
+DROP TRIGGER IF EXISTS app_recipe_search_vector_trigger ON app_recipe;
+DROP FUNCTION IF EXISTS app_recipe_search_vector_update();
+'''
+
+
+def postgres_only(sql):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_recipe_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Заполняется триггером из названия и текста', null=True),
+        ),
+        migrations.RunPython(
+            postgres_only(SEARCH_TRIGGER),
+            postgres_only(DROP_SEARCH_TRIGGER),
+        ),
+    ]
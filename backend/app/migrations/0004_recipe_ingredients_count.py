@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def count_ingredients(apps, schema_editor):
+    Recipe = apps.get_model('app', 'Recipe')
+    RecipeIngredient = apps.get_model('app', 'RecipeIngredient')
+    counts = (
+        RecipeIngredient.objects.filter(recipe=OuterRef('pk'))
+        .order_by().values('recipe').annotate(total=Count('id'))
+        .values('total')
+    )
+    Recipe.objects.filter(ingredients_in__isnull=False).update(
+        ingredients_count=Subquery(counts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredients_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество ингредиентов'),
+        ),
+        migrations.AddIndex(
+            model_name='recipeingredient',
+            index=models.Index(fields=['ingredient', 'recipe'], name='ingredient_recipe_idx'),
+        ),
+        migrations.RunPython(count_ingredients, migrations.RunPython.noop),
+    ]
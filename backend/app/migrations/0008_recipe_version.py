@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+def reset_documents(apps, schema_editor):
+    # Старые документы без версии, до rebuild_recipe_documents
+    # рецепты отдаются обычной сериализацией.
+    Recipe = apps.get_model('app', 'Recipe')
+    Recipe.objects.update(document={})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Увеличивается при каждом изменении рецепта', verbose_name='Версия'),
+        ),
+        migrations.RunPython(reset_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:41
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_recipe_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='amount',
+            field=models.FloatField(validators=[django.core.validators.MinValueValidator(0, message='Число должно быть положительное')]),
+        ),
+    ]
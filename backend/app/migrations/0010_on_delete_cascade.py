@@ -0,0 +1,34 @@
+from django.db import migrations
+
+from app.cascade import set_on_delete
+
+# Таблицы связей без сигналов удаления: их строки безопасно удалять
+# каскадом в базе. Django пересоздаст ограничение без каскада, если
+# поле изменится в будущей миграции, тогда его нужно добавить снова.
+CASCADE_FIELDS = (
+    ('Recipe', 'author'),
+    ('Recipe_tags', 'recipe'),
+    ('RecipeIngredient', 'recipe'),
+    ('Favorite', 'user'),
+    ('Favorite', 'recipe'),
+    ('Shopping', 'user'),
+    ('Shopping', 'recipe'),
+    ('Subscribe', 'user'),
+    ('Subscribe', 'author'),
+    ('FeedEntry', 'user'),
+    ('FeedEntry', 'recipe'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_recipeingredient_amount_min_value'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            set_on_delete('CASCADE', CASCADE_FIELDS),
+            set_on_delete('NO ACTION', CASCADE_FIELDS),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_on_delete_cascade'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarRecipes',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similar', serialize=False, to='app.recipe', verbose_name='Рецепт')),
+                ('neighbours', models.JSONField(default=list, help_text='id похожих рецептов по убыванию сходства', verbose_name='Похожие рецепты')),
+                ('scores', models.JSONField(default=list, verbose_name='Сходство')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Похожие рецепты',
+                'verbose_name_plural': 'Похожие рецепты',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from app.cascade import set_on_delete
+
+# Внешний ключ из 0011 создаётся в конце той миграции,
+# поэтому каскад на него ставится отдельной миграцией.
+CASCADE_FIELDS = (('SimilarRecipes', 'recipe'),)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_similarrecipes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            set_on_delete('CASCADE', CASCADE_FIELDS),
+            set_on_delete('NO ACTION', CASCADE_FIELDS),
+        ),
+    ]
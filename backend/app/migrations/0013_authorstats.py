@@ -0,0 +1,60 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:47
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    AuthorStats = apps.get_model('app', 'AuthorStats')
+    Recipe = apps.get_model('app', 'Recipe')
+    Subscribe = apps.get_model('app', 'Subscribe')
+    Favorite = apps.get_model('app', 'Favorite')
+    stats = {}
+
+    def get(author_id):
+        if author_id not in stats:
+            stats[author_id] = AuthorStats(author_id=author_id)
+        return stats[author_id]
+
+    rows = Recipe.objects.values('author').annotate(
+        count=Count('id'), total=Sum('cooking_time')).order_by()
+    for row in rows:
+        get(row['author']).recipes_count = row['count']
+        get(row['author']).cooking_time_total = row['total']
+    rows = Subscribe.objects.values('author').annotate(
+        count=Count('id')).order_by()
+    for row in rows:
+        get(row['author']).followers_count = row['count']
+    rows = Favorite.objects.values('recipe__author').annotate(
+        count=Count('id')).order_by()
+    for row in rows:
+        get(row['recipe__author']).favorites_count = row['count']
+    AuthorStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('app', '0012_similarrecipes_cascade'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('recipes_count', models.PositiveIntegerField(default=0, verbose_name='Рецептов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('favorites_count', models.PositiveIntegerField(default=0, help_text='Сколько раз рецепты автора добавили в избранное', verbose_name='Добавлений в избранное')),
+                ('cooking_time_total', models.PositiveBigIntegerField(default=0, verbose_name='Суммарное время приготовления')),
+            ],
+            options={
+                'verbose_name': 'Статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:52
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('app', '0013_authorstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Название')),
+                ('version', models.PositiveIntegerField(default=1, editable=False, help_text='Увеличивается при каждом изменении записей плана', verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'План питания',
+                'verbose_name_plural': 'Планы питания',
+                'ordering': ('-id',),
+            },
+        ),
+        migrations.CreateModel(
+            name='MealPlanEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('servings', models.FloatField(default=1, help_text='Во сколько раз умножить количества рецепта', validators=[django.core.validators.MinValueValidator(0.1, message='Множитель порций должен быть не меньше 0.1')], verbose_name='Порции')),
+            ],
+            options={
+                'verbose_name': 'Запись плана питания',
+                'verbose_name_plural': 'Записи планов питания',
+                'ordering': ('date', 'id'),
+            },
+        ),
+        migrations.AddField(
+            model_name='mealplanentry',
+            name='plan',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='app.mealplan', verbose_name='План'),
+        ),
+        migrations.AddField(
+            model_name='mealplanentry',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meal_plan_entries', to='app.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AddField(
+            model_name='mealplan',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meal_plans', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddIndex(
+            model_name='mealplanentry',
+            index=models.Index(fields=['plan', 'date'], name='meal_plan_date_idx'),
+        ),
+    ]
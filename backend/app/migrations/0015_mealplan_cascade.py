@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from app.cascade import set_on_delete
+
+# Внешние ключи из 0014 создаются в конце той миграции,
+# поэтому каскад на них ставится отдельной миграцией.
+CASCADE_FIELDS = (
+    ('MealPlan', 'user'),
+    ('MealPlanEntry', 'plan'),
+    ('MealPlanEntry', 'recipe'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_mealplan'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            set_on_delete('CASCADE', CASCADE_FIELDS),
+            set_on_delete('NO ACTION', CASCADE_FIELDS),
+        ),
+    ]
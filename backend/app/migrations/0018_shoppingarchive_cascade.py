@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from app.cascade import set_on_delete
+
+# Внешние ключи из 0017 создаются в конце той миграции,
+# поэтому каскад на них ставится отдельной миграцией.
+CASCADE_FIELDS = (
+    ('ShoppingArchive', 'user'),
+    ('ShoppingArchive', 'recipe'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_link_created_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            set_on_delete('CASCADE', CASCADE_FIELDS),
+            set_on_delete('NO ACTION', CASCADE_FIELDS),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:58
+
+from django.db import migrations, models
+
+
+def reset_documents(apps, schema_editor):
+    # В старых документах нет пищевой ценности, до
+    # rebuild_recipe_documents рецепты отдаются обычной сериализацией.
+    Recipe = apps.get_model('app', 'Recipe')
+    Recipe.objects.update(document={})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_shoppingarchive_cascade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='calories',
+            field=models.FloatField(blank=True, help_text='На одну единицу измерения', null=True, verbose_name='Калории, ккал'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='carbohydrates',
+            field=models.FloatField(blank=True, help_text='На одну единицу измерения', null=True, verbose_name='Углеводы, г'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='fats',
+            field=models.FloatField(blank=True, help_text='На одну единицу измерения', null=True, verbose_name='Жиры, г'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='proteins',
+            field=models.FloatField(blank=True, help_text='На одну единицу измерения', null=True, verbose_name='Белки, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='calories',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Калории, ккал'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='carbohydrates',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Углеводы, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='fats',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Жиры, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='proteins',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Белки, г'),
+        ),
+        migrations.RunPython(reset_documents, migrations.RunPython.noop),
+    ]
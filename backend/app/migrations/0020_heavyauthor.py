@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:16
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_heavy_authors(apps, schema_editor):
+    Subscribe = apps.get_model('app', 'Subscribe')
+    HeavyAuthor = apps.get_model('app', 'HeavyAuthor')
+    authors = (
+        Subscribe.objects.values('author').annotate(total=Count('id'))
+        .filter(total__gt=settings.FEED_FANOUT_LIMIT).values_list(
+            'author', flat=True)
+    )
+    HeavyAuthor.objects.bulk_create(
+        HeavyAuthor(author_id=author_id) for author_id in authors)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('app', '0019_nutrition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeavyAuthor',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_heavy', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('since', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Автор с чтением ленты при запросе',
+                'verbose_name_plural': 'Авторы с чтением ленты при запросе',
+            },
+        ),
+        migrations.RunPython(
+            fill_heavy_authors, migrations.RunPython.noop),
+    ]
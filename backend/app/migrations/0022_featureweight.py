@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_catalogversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeatureWeight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ingredient', 'Ингредиент'), ('tag', 'Тег')], max_length=10, verbose_name='Признак')),
+                ('feature_id', models.BigIntegerField(verbose_name='id ингредиента или тега')),
+                ('idf', models.FloatField(verbose_name='Вес idf')),
+            ],
+            options={
+                'verbose_name': 'Вес признака',
+                'verbose_name_plural': 'Веса признаков',
+            },
+        ),
+        migrations.AddField(
+            model_name='similarrecipes',
+            name='norm',
+            field=models.FloatField(default=0, help_text='Длина вектора признаков рецепта', verbose_name='Норма'),
+        ),
+        migrations.AddConstraint(
+            model_name='featureweight',
+            constraint=models.UniqueConstraint(fields=('kind', 'feature_id'), name='unique_feature_weight'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:26
+
+from django.db import migrations, models
+
+NUTRIENTS = ('calories', 'proteins', 'fats', 'carbohydrates')
+BATCH_SIZE = 1000
+
+
+def fill_nutrition(apps, schema_editor):
+    # Итог неизвестен, если значение не задано хотя бы у одного
+    # ингредиента. Документы со старыми нулями сбрасываются до
+    # rebuild_recipe_documents.
+    Recipe = apps.get_model('app', 'Recipe')
+    RecipeIngredient = apps.get_model('app', 'RecipeIngredient')
+    totals = {}
+    rows = RecipeIngredient.objects.values_list(
+        'recipe_id', 'amount',
+        *(f'ingredient__{name}' for name in NUTRIENTS)
+    ).order_by()
+    for recipe_id, amount, *values in rows.iterator():
+        current = totals.setdefault(recipe_id, [0] * len(NUTRIENTS))
+        for index, value in enumerate(values):
+            if value is None or current[index] is None:
+                current[index] = None
+            else:
+                current[index] += value * amount
+    recipes = []
+    for recipe in Recipe.objects.only('id').iterator():
+        values = totals.get(recipe.id, [0] * len(NUTRIENTS))
+        for name, total in zip(NUTRIENTS, values):
+            setattr(
+                recipe, name, None if total is None else round(total, 2))
+        recipe.document = {}
+        recipes.append(recipe)
+    Recipe.objects.bulk_update(
+        recipes, [*NUTRIENTS, 'document'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0022_featureweight'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='calories',
+            field=models.FloatField(db_index=True, editable=False, help_text='Пусто, если у ингредиента не задано значение', null=True, verbose_name='Калории, ккал'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='carbohydrates',
+            field=models.FloatField(db_index=True, editable=False, help_text='Пусто, если у ингредиента не задано значение', null=True, verbose_name='Углеводы, г'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='fats',
+            field=models.FloatField(db_index=True, editable=False, help_text='Пусто, если у ингредиента не задано значение', null=True, verbose_name='Жиры, г'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='proteins',
+            field=models.FloatField(db_index=True, editable=False, help_text='Пусто, если у ингредиента не задано значение', null=True, verbose_name='Белки, г'),
+        ),
+        migrations.RunPython(fill_nutrition, migrations.RunPython.noop),
+    ]
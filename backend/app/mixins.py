@@ -1,9 +1,69 @@
 from rest_framework import mixins
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from .compiled import compile_rows, row_fields
+from .compression import catalog_response
+from .routers import (is_pinned, pin_to_primary, read_from_primary,
+                      read_from_replica)
+
 
 class UserModelMixin(mixins.ListModelMixin,
                      mixins.CreateModelMixin,
                      mixins.RetrieveModelMixin,
                      GenericViewSet,):
     pass
+
+
+class CompiledListMixin:
+    """Список без пагинации читается через .values() без моделей и DRF."""
+
+    def get_list_data(self):
+        serializer = self.get_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values(*row_fields(serializer))
+        serialize = compile_rows(serializer)
+        return [serialize(row) for row in rows]
+
+    def list(self, request, *args, **kwargs):
+        return Response(self.get_list_data())
+
+
+class CatalogMixin(CompiledListMixin):
+    """Полный список без параметров отдаётся готовым сжатым из кэша."""
+
+    catalog_name = None
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params or request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        return catalog_response(request, self.catalog_name, self.get_list_data)
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы читают с реплики.
+
+    Действия из primary_actions пишут в базу даже на GET и всегда
+    работают с основной базой, как и любые запросы пользователя
+    в течение REPLICA_STICKY_SECONDS после его записи.
+    """
+
+    primary_actions = ()
+
+    def writes(self, request):
+        return (request.method not in SAFE_METHODS
+                or self.action in self.primary_actions)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not self.writes(request) and not is_pinned(request):
+            self.replica_token = read_from_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        read_from_primary(getattr(self, 'replica_token', None))
+        self.replica_token = None
+        if (self.writes(request) and request.user.is_authenticated
+                and response.status_code < 400):
+            pin_to_primary(response, request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,7 +1,9 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core import validators
 from django.db import models
 from django.db.models.constraints import UniqueConstraint
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -44,6 +46,30 @@ class Ingredient(models.Model):
         max_length=15,
         verbose_name='Единицы измерения'
     )
+    calories = models.FloatField(
+        null=True,
+        blank=True,
+        help_text='На одну единицу измерения',
+        verbose_name='Калории, ккал'
+    )
+    proteins = models.FloatField(
+        null=True,
+        blank=True,
+        help_text='На одну единицу измерения',
+        verbose_name='Белки, г'
+    )
+    fats = models.FloatField(
+        null=True,
+        blank=True,
+        help_text='На одну единицу измерения',
+        verbose_name='Жиры, г'
+    )
+    carbohydrates = models.FloatField(
+        null=True,
+        blank=True,
+        help_text='На одну единицу измерения',
+        verbose_name='Углеводы, г'
+    )
 
     class Meta:
         verbose_name_plural = 'Ингредиенты'
@@ -83,6 +109,60 @@ class Recipe(models.Model):
         help_text='Время приготовления в минутах',
         verbose_name='Длительность'
     )
+    ingredients_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество ингредиентов'
+    )
+    document = models.JSONField(
+        default=dict,
+        editable=False,
+        help_text='Готовое представление рецепта для чтения',
+        verbose_name='Документ'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text='Заполняется триггером из названия и текста'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        help_text='Увеличивается при каждом изменении рецепта',
+        verbose_name='Версия'
+    )
+    calories = models.FloatField(
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text='Пусто, если у ингредиента не задано значение',
+        verbose_name='Калории, ккал'
+    )
+    proteins = models.FloatField(
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text='Пусто, если у ингредиента не задано значение',
+        verbose_name='Белки, г'
+    )
+    fats = models.FloatField(
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text='Пусто, если у ингредиента не задано значение',
+        verbose_name='Жиры, г'
+    )
+    carbohydrates = models.FloatField(
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text='Пусто, если у ингредиента не задано значение',
+        verbose_name='Углеводы, г'
+    )
 
     class Meta:
         verbose_name_plural = 'Рецепты'
@@ -92,6 +172,17 @@ class Recipe(models.Model):
     def __str__(self):
         return self.name
 
+    def bump_version(self, expected=None):
+        """Увеличивает версию, если текущая входит в ожидаемые."""
+        recipes = Recipe.objects.filter(pk=self.pk)
+        if expected is not None:
+            recipes = recipes.filter(version__in=expected)
+        if not recipes.update(version=models.F('version') + 1):
+            return False
+        self.version = Recipe.objects.values_list(
+            'version', flat=True).get(pk=self.pk)
+        return True
+
     def short_text(self):
         if len(self.text) > 40:
             return f"{self.text[:40]}..."
@@ -109,6 +200,10 @@ class Favorite(models.Model):
         related_name='favorites',
         on_delete=models.CASCADE
     )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         verbose_name_plural = 'Избранные'
@@ -135,6 +230,11 @@ class Shopping(models.Model):
         on_delete=models.CASCADE,
         related_name='shoppings'
     )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         verbose_name_plural = 'Покупки'
@@ -150,6 +250,32 @@ class Shopping(models.Model):
         return f"{self.user} - {self.recipe}"
 
 
+class ShoppingArchive(models.Model):
+    """Старые записи списка покупок, перенесённые командой archive_shopping."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(verbose_name='Дата добавления')
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата архивации'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Архив покупок'
+        verbose_name = 'Архивная покупка'
+
+    def __str__(self):
+        return f"{self.user_id} - {self.recipe_id}"
+
+
 class Subscribe(models.Model):
     user = models.ForeignKey(
         User,
@@ -161,6 +287,10 @@ class Subscribe(models.Model):
         related_name='subscribes',
         on_delete=models.CASCADE
     )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Дата подписки'
+    )
 
     class Meta:
         verbose_name_plural = 'Подписки'
@@ -176,6 +306,157 @@ class Subscribe(models.Model):
         return f"{self.user} - {self.author}"
 
 
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name='feed',
+        on_delete=models.CASCADE
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='feed_entries',
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        verbose_name_plural = 'Ленты подписок'
+        verbose_name = 'Запись ленты'
+        constraints = [
+            UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.recipe}"
+
+
+class HeavyAuthor(models.Model):
+    """Автор, рецепты которого не раздаются в ленты, а читаются при запросе."""
+    author = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='feed_heavy',
+        on_delete=models.CASCADE,
+        verbose_name='Автор'
+    )
+    since = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'Авторы с чтением ленты при запросе'
+        verbose_name = 'Автор с чтением ленты при запросе'
+
+    def __str__(self):
+        return str(self.author_id)
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE,
+        verbose_name='Автор'
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Сколько раз рецепты автора добавили в избранное',
+        verbose_name='Добавлений в избранное'
+    )
+    cooking_time_total = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Суммарное время приготовления'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Статистика авторов'
+        verbose_name = 'Статистика автора'
+
+    def __str__(self):
+        return str(self.author)
+
+    @property
+    def average_cooking_time(self):
+        if not self.recipes_count:
+            return None
+        return round(self.cooking_time_total / self.recipes_count, 1)
+
+
+class SimilarRecipes(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        primary_key=True,
+        related_name='similar',
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт'
+    )
+    neighbours = models.JSONField(
+        default=list,
+        help_text='id похожих рецептов по убыванию сходства',
+        verbose_name='Похожие рецепты'
+    )
+    scores = models.JSONField(
+        default=list,
+        verbose_name='Сходство'
+    )
+    norm = models.FloatField(
+        default=0,
+        help_text='Длина вектора признаков рецепта',
+        verbose_name='Норма'
+    )
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Похожие рецепты'
+        verbose_name = 'Похожие рецепты'
+
+    def __str__(self):
+        return str(self.recipe)
+
+
+class FeatureWeight(models.Model):
+    INGREDIENT = 'ingredient'
+    TAG = 'tag'
+    KINDS = (
+        (INGREDIENT, 'Ингредиент'),
+        (TAG, 'Тег'),
+    )
+
+    kind = models.CharField(
+        max_length=10,
+        choices=KINDS,
+        verbose_name='Признак'
+    )
+    feature_id = models.BigIntegerField(
+        verbose_name='id ингредиента или тега'
+    )
+    idf = models.FloatField(
+        verbose_name='Вес idf'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Веса признаков'
+        verbose_name = 'Вес признака'
+        constraints = [
+            UniqueConstraint(
+                fields=('kind', 'feature_id'),
+                name='unique_feature_weight'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.feature_id}: {self.idf}'
+
+
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
         Recipe,
@@ -191,8 +472,8 @@ class RecipeIngredient(models.Model):
     )
     amount = models.FloatField(
         validators=[
-            validators.RegexValidator(
-                regex='^[0-9.]+$',
+            validators.MinValueValidator(
+                0,
                 message='Число должно быть положительное'
             )
         ]
@@ -201,6 +482,182 @@ class RecipeIngredient(models.Model):
     class Meta:
         verbose_name_plural = 'Рецепты с ингредиентами'
         verbose_name = 'Рецепт с ингредиентом'
+        indexes = [
+            models.Index(
+                fields=('ingredient', 'recipe'),
+                name='ingredient_recipe_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.recipe} - {self.ingredient}"
+
+
+class MealPlan(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='meal_plans',
+        verbose_name='Пользователь'
+    )
+    name = models.CharField(
+        max_length=200,
+        verbose_name='Название'
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        help_text='Увеличивается при каждом изменении записей плана',
+        verbose_name='Версия'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Планы питания'
+        verbose_name = 'План питания'
+        ordering = ('-id',)
+
+    def __str__(self):
+        return self.name
+
+    def bump_version(self):
+        MealPlan.objects.filter(pk=self.pk).update(
+            version=models.F('version') + 1)
+        self.refresh_from_db(fields=('version',))
+
+
+class MealPlanEntry(models.Model):
+    plan = models.ForeignKey(
+        MealPlan,
+        on_delete=models.CASCADE,
+        related_name='entries',
+        verbose_name='План'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='meal_plan_entries',
+        verbose_name='Рецепт'
+    )
+    date = models.DateField(verbose_name='Дата')
+    servings = models.FloatField(
+        default=1,
+        validators=[
+            validators.MinValueValidator(
+                0.1,
+                message='Множитель порций должен быть не меньше 0.1'
+            )
+        ],
+        help_text='Во сколько раз умножить количества рецепта',
+        verbose_name='Порции'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Записи планов питания'
+        verbose_name = 'Запись плана питания'
+        ordering = ('date', 'id')
+        indexes = [
+            models.Index(
+                fields=('plan', 'date'),
+                name='meal_plan_date_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.recipe}"
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        max_length=100,
+        verbose_name='Задача'
+    )
+    payload = models.JSONField(
+        default=dict,
+        verbose_name='Аргументы'
+    )
+    result = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name='Результат'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Ошибка'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Статус'
+    )
+    priority = models.SmallIntegerField(
+        default=0,
+        help_text='Задачи с большим приоритетом выполняются раньше',
+        verbose_name='Приоритет'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3,
+        verbose_name='Максимум попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Запустить после'
+    )
+    user = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        on_delete=models.CASCADE
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Фоновые задачи'
+        verbose_name = 'Фоновая задача'
+        ordering = ('-id',)
+        indexes = [
+            models.Index(
+                fields=('status', '-priority', 'run_at'),
+                name='job_queue_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class CatalogVersion(models.Model):
+    name = models.CharField(
+        max_length=50,
+        primary_key=True,
+        verbose_name='Каталог'
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        help_text='Увеличивается при каждом изменении каталога',
+        verbose_name='Версия'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Версии каталогов'
+        verbose_name = 'Версия каталога'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
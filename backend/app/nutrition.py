@@ -0,0 +1,22 @@
+NUTRIENTS = ('calories', 'proteins', 'fats', 'carbohydrates')
+
+
+def set_nutrition(recipe):
+    """Считает пищевую ценность рецепта по его ингредиентам.
+
+    Значения ингредиентов заданы на единицу измерения, поэтому умножаются
+    на количество в рецепте. Если значение не задано хотя бы у одного
+    ингредиента, итог неизвестен и сохраняется как None, чтобы рецепт
+    не проходил фильтры по пищевой ценности. Ожидает prefetch
+    ingredients_in__ingredient.
+    """
+    totals = dict.fromkeys(NUTRIENTS, 0)
+    for item in recipe.ingredients_in.all():
+        for name in NUTRIENTS:
+            value = getattr(item.ingredient, name)
+            if value is None or totals[name] is None:
+                totals[name] = None
+            else:
+                totals[name] += value * item.amount
+    for name, total in totals.items():
+        setattr(recipe, name, None if total is None else round(total, 2))
@@ -1,5 +1,41 @@
-from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class LimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class FeedPagination(CursorPagination):
+    ordering = '-id'
+    page_size_query_param = 'limit'
+
+
+def estimate_count(queryset):
+    """Оценка числа строк из плана запроса PostgreSQL."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Для больших выборок берёт оценку планировщика вместо COUNT(*).
+
+    Точный подсчёт остаётся, пока оценка меньше ADMIN_EXACT_COUNT_LIMIT,
+    так что на небольших таблицах и узких фильтрах число строк верное.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.ADMIN_EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
@@ -0,0 +1,80 @@
+"""SQL для секционирования таблиц связей по хешу user_id на PostgreSQL.
+
+Таблица переименовывается, на её месте создаётся секционированная
+с тем же именем, строки переносятся, затем заново создаются ключи,
+уникальные ограничения, индексы и внешние ключи с ON DELETE CASCADE.
+Первичный ключ становится (id, user_id): ключ секционирования должен
+входить во все уникальные ограничения. Последующие миграции Django,
+меняющие эти таблицы, после секционирования нужно проверять вручную.
+"""
+from django.db import connection
+
+from .models import Favorite, Shopping, Subscribe
+
+PARTITION_KEY = 'user_id'
+PARTITIONED_MODELS = (Favorite, Shopping, Subscribe)
+
+
+def partition_sql(model, partitions):
+    quote = connection.ops.quote_name
+    meta = model._meta
+    table = meta.db_table
+    old = f'{table}_unpartitioned'
+    pk = meta.pk.column
+    statements = [
+        f'ALTER TABLE {quote(table)} RENAME TO {quote(old)}',
+        f'CREATE TABLE {quote(table)} (LIKE {quote(old)} INCLUDING DEFAULTS)'
+        f' PARTITION BY HASH ({quote(PARTITION_KEY)})',
+        f'ALTER SEQUENCE {quote(f"{table}_{pk}_seq")} '
+        f'OWNED BY {quote(table)}.{quote(pk)}',
+    ]
+    statements += [
+        f'CREATE TABLE {quote(f"{table}_p{remainder}")} '
+        f'PARTITION OF {quote(table)} '
+        f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})'
+        for remainder in range(partitions)
+    ]
+    statements += [
+        f'INSERT INTO {quote(table)} SELECT * FROM {quote(old)}',
+        f'DROP TABLE {quote(old)}',
+        f'ALTER TABLE {quote(table)} '
+        f'ADD PRIMARY KEY ({quote(pk)}, {quote(PARTITION_KEY)})',
+    ]
+    leading = set()
+    for constraint in meta.constraints:
+        columns = [meta.get_field(name).column for name in constraint.fields]
+        leading.add(columns[0])
+        statements.append(
+            f'ALTER TABLE {quote(table)} ADD CONSTRAINT '
+            f'{quote(constraint.name)} UNIQUE '
+            f'({", ".join(quote(column) for column in columns)})'
+        )
+    for field in meta.local_fields:
+        if field.primary_key or field.column in leading:
+            continue
+        if field.db_index or field.many_to_one:
+            statements.append(
+                f'CREATE INDEX {quote(f"{table}_{field.column}_idx")} '
+                f'ON {quote(table)} ({quote(field.column)})'
+            )
+    for field in meta.local_fields:
+        if not field.many_to_one:
+            continue
+        target = field.target_field
+        statements.append(
+            f'ALTER TABLE {quote(table)} ADD CONSTRAINT '
+            f'{quote(f"{table}_{field.column}_fk")} '
+            f'FOREIGN KEY ({quote(field.column)}) REFERENCES '
+            f'{quote(target.model._meta.db_table)} ({quote(target.column)}) '
+            f'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED'
+        )
+    statements.append(f'ANALYZE {quote(table)}')
+    return statements
+
+
+def is_partitioned(model):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass(%s)", [model._meta.db_table])
+        return cursor.fetchone() is not None
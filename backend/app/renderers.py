@@ -0,0 +1,66 @@
+import math
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# json пишет такие числа в экспоненциальной записи (1e-05), а orjson
+# без неё (0.00001). Остальные конечные float обе библиотеки выводят
+# одинаково.
+EXPONENT_BELOW = 1e-4
+
+
+def has_unsafe_floats(data):
+    """Есть ли в данных float, который orjson запишет не так, как json.
+
+    Проверка по type() обходится дешевле isinstance на частых строках
+    и целых, иначе обход съедает выигрыш от orjson.
+    """
+    stack = [data]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        value = pop()
+        kind = type(value)
+        if kind is str or kind is int or kind is bool or value is None:
+            continue
+        if kind is float or isinstance(value, float):
+            if not math.isfinite(value) or 0 < abs(value) < EXPONENT_BELOW:
+                return True
+        elif isinstance(value, dict):
+            extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            extend(value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson с тем же побайтовым результатом.
+
+    Данные с NaN, бесконечностью или числами в экспоненциальной записи
+    рендерит обычный JSONRenderer, в том числе с его ошибкой на NaN.
+    Без orjson, с отступами или нестандартными настройками DRF тоже
+    работает как обычный JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (orjson is None or data is None or indent
+                or not self.compact or self.ensure_ascii
+                or has_unsafe_floats(data)):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
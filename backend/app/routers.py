@@ -0,0 +1,60 @@
+"""Чтение с реплик для безопасных запросов.
+
+Реплика выбирается только на время обработки запроса представлением
+с ReplicaReadMixin. После собственной записи пользователь на
+REPLICA_STICKY_SECONDS закрепляется за основной базой, чтобы сразу
+видеть свои изменения, даже если реплика отстаёт. Закрепление хранится
+в подписанной cookie, а не в кэше, поэтому его видят все процессы.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+STICKY_COOKIE = 'primary_db'
+STICKY_SALT = 'app.routers.sticky'
+
+_read_db = ContextVar('read_db', default=None)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return _read_db.get()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+def read_from_replica():
+    """Направляет чтения текущего контекста на случайную реплику."""
+    if not settings.DATABASE_REPLICAS:
+        return None
+    return _read_db.set(random.choice(settings.DATABASE_REPLICAS))
+
+
+def read_from_primary(token):
+    if token is not None:
+        _read_db.reset(token)
+
+
+def pin_to_primary(response, user):
+    response.set_signed_cookie(
+        STICKY_COOKIE, str(user.pk), salt=STICKY_SALT,
+        max_age=settings.REPLICA_STICKY_SECONDS, httponly=True,
+        samesite='Lax'
+    )
+
+
+def is_pinned(request):
+    if not request.user.is_authenticated:
+        return False
+    user_id = request.get_signed_cookie(
+        STICKY_COOKIE, default=None, salt=STICKY_SALT,
+        max_age=settings.REPLICA_STICKY_SECONDS
+    )
+    return user_id == str(request.user.pk)
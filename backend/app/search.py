@@ -0,0 +1,18 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, Q
+
+SEARCH_CONFIG = 'russian'
+
+
+def search_recipes(queryset, value):
+    """Полнотекстовый поиск по названию и тексту с ранжированием."""
+    if connection.vendor != 'postgresql':
+        return queryset.filter(
+            Q(name__icontains=value) | Q(text__icontains=value))
+    query = SearchQuery(value, config=SEARCH_CONFIG, search_type='websearch')
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', '-id')
+    )
@@ -1,12 +1,63 @@
-from rest_framework import serializers
-from rest_framework.generics import get_object_or_404
-
-from .fields import Base64ImageField
-from .models import (Favorite, Ingredient, Recipe, RecipeIngredient, Shopping,
-                     Subscribe, Tag, User)
-
+from collections import OrderedDict
+from functools import partial
 
-class UserSerializer(serializers.ModelSerializer):
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .compiled import CompiledListSerializer, compile_document
+from .documents import rebuild_documents
+from .exceptions import PreconditionFailed
+from .fields import AuthorStatsField, Base64ImageField
+from .models import (Favorite, Ingredient, Job, MealPlan, MealPlanEntry,
+                     Recipe, RecipeIngredient, Shopping, Subscribe, Tag, User)
+
+PERSONAL_FIELDS = ('is_favorited', 'is_in_shopping_cart')
+
+
+def parse_fields_param(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Состав ответа задаётся параметрами запроса fields, omit и expand.
+
+    Неотданные поля не сериализуются и не порождают запросов. Если
+    передан expand, вложенные объекты из expandable_fields, которых
+    в нём нет, отдаются одними id.
+    """
+    expandable_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if (request is None or request.method not in SAFE_METHODS
+                or not self.is_response_root()):
+            return fields
+        params = request.query_params
+        only = parse_fields_param(params.get('fields'))
+        if only:
+            fields = OrderedDict(
+                (name, field) for name, field in fields.items()
+                if name in only
+            )
+        for name in parse_fields_param(params.get('omit')):
+            fields.pop(name, None)
+        if 'expand' in params:
+            expand = parse_fields_param(params.get('expand'))
+            for name, collapsed in self.expandable_fields.items():
+                if name in fields and name not in expand:
+                    fields[name] = collapsed()
+        return fields
+
+    def is_response_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -49,18 +100,38 @@ class UserSerializer(serializers.ModelSerializer):
             return False
 
 
+class UserProfileSerializer(UserSerializer):
+    recipes_count = AuthorStatsField('recipes_count')
+    followers_count = AuthorStatsField('followers_count')
+    favorites_count = AuthorStatsField('favorites_count')
+    average_cooking_time = AuthorStatsField('average_cooking_time')
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + (
+            'recipes_count',
+            'followers_count',
+            'favorites_count',
+            'average_cooking_time'
+        )
+
+
 class TagSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Tag
         fields = ('id', 'name', 'color', 'slug')
+        list_serializer_class = CompiledListSerializer
 
 
 class IngredientSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Ingredient
-        fields = ('id', 'name', 'measurement_unit')
+        fields = (
+            'id', 'name', 'measurement_unit', 'calories', 'proteins', 'fats',
+            'carbohydrates'
+        )
+        list_serializer_class = CompiledListSerializer
 
 
 class RecipeIngredientSerializer(serializers.ModelSerializer):
@@ -78,9 +149,10 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = RecipeIngredient
         fields = ('id', 'name', 'measurement_unit', 'amount')
+        list_serializer_class = CompiledListSerializer
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tags = TagSerializer(
         many=True,
         read_only=True
@@ -108,12 +180,62 @@ class RecipeSerializer(serializers.ModelSerializer):
             'ingredients', 'name',
             'image', 'text',
             'cooking_time',
+            'calories', 'proteins', 'fats', 'carbohydrates',
+            'version',
+            'updated_at',
         )
-    
+
+    expandable_fields = {
+        'tags': partial(
+            serializers.PrimaryKeyRelatedField, many=True, read_only=True),
+        'author': partial(
+            serializers.PrimaryKeyRelatedField, read_only=True),
+        'ingredients': partial(
+            serializers.PrimaryKeyRelatedField, many=True, read_only=True),
+    }
+
+    def to_representation(self, instance):
+        if not instance.document:
+            return super().to_representation(instance)
+        fields = self.fields
+        if not hasattr(self, '_read_document'):
+            self._read_document = compile_document(self)
+        data = self._read_document(instance.document)
+        if 'is_favorited' in fields:
+            data['is_favorited'] = self.get_is_favorited(instance)
+        if 'is_in_shopping_cart' in fields:
+            data['is_in_shopping_cart'] = self.get_is_in_shopping_cart(
+                instance)
+        if isinstance(fields.get('author'), UserSerializer):
+            data['author']['is_subscribed'] = self.get_is_author_subscribed(
+                instance)
+        return data
+
+    def to_document(self, instance):
+        data = super().to_representation(instance)
+        for field in PERSONAL_FIELDS:
+            data.pop(field)
+        data['author'].pop('is_subscribed')
+        return data
+
     def get_image(self, obj):
         return '/media/' + obj.image.name
 
+    def get_is_author_subscribed(self, obj):
+        if hasattr(obj, 'is_author_subscribed'):
+            return obj.is_author_subscribed
+        try:
+            user = self.context['request'].user
+            if not user.is_anonymous:
+                return user.subscribers.filter(author=obj.author_id).exists()
+            else:
+                return False
+        except KeyError:
+            return False
+
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         try:
             user = self.context['request'].user
             if not user.is_anonymous:
@@ -124,6 +246,8 @@ class RecipeSerializer(serializers.ModelSerializer):
             return False
     
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         try:
             user = self.context['request'].user
             if not user.is_anonymous:
@@ -134,6 +258,19 @@ class RecipeSerializer(serializers.ModelSerializer):
             return False
 
 
+class RecipeMatchSerializer(RecipeSerializer):
+    missing = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('missing',)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if 'missing' in self.fields:
+            data['missing'] = instance.missing
+        return data
+
+
 class PostRecipeIngredientSerializer(serializers.ModelSerializer):
     id = serializers.PrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(),
@@ -159,20 +296,24 @@ class RecipePostSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = (
-            'ingredients', 'tags', 'image', 'name', 'text', 'cooking_time'
+            'ingredients', 'tags', 'image', 'name', 'text', 'cooking_time',
+            'version'
         )
 
     @staticmethod
     def save_ingredients(ingredients, recipe):
-        for ingredient in ingredients:
-            current_ingredient = get_object_or_404(
-                Ingredient, pk=ingredient['ingredient']['id'].id)
-            RecipeIngredient.objects.create(
-                ingredient=current_ingredient,
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                ingredient=ingredient['ingredient']['id'],
                 recipe=recipe,
                 amount=ingredient['amount']
             )
-    
+            for ingredient in ingredients
+        )
+        recipe.ingredients_count = len(ingredients)
+        Recipe.objects.filter(pk=recipe.pk).update(
+            ingredients_count=recipe.ingredients_count)
+
     def validate(self, data):
         tag_ids = [tag.id for tag in data['tags']]
         ingredient_ids = [
@@ -194,21 +335,27 @@ class RecipePostSerializer(serializers.ModelSerializer):
                     'Количество ингредиентов не должно быть меньше нуля')
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients_in')
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self.save_ingredients(ingredients, recipe)
+        rebuild_documents(Recipe.objects.filter(pk=recipe.pk))
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
+        if not instance.bump_version(self.context.get('if_match')):
+            raise PreconditionFailed()
         ingredients = validated_data.pop('ingredients_in')
         tags = validated_data.pop('tags')
         instance.tags.set(tags)
         instance.ingredients.clear()
         self.save_ingredients(ingredients, instance)
         super().update(instance, validated_data)
+        rebuild_documents(Recipe.objects.filter(pk=instance.pk))
         return instance
 
 
@@ -310,7 +457,11 @@ class SubscriptionsRecipesSerializer(serializers.ModelSerializer):
         many=True,
         source='author.recipes'
     )
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = AuthorStatsField('recipes_count', source='author')
+    followers_count = AuthorStatsField('followers_count', source='author')
+    favorites_count = AuthorStatsField('favorites_count', source='author')
+    average_cooking_time = AuthorStatsField(
+        'average_cooking_time', source='author')
 
     class Meta:
         model = Subscribe
@@ -322,7 +473,10 @@ class SubscriptionsRecipesSerializer(serializers.ModelSerializer):
             'last_name',
             'is_subscribed',
             'recipes',
-            'recipes_count'
+            'recipes_count',
+            'followers_count',
+            'favorites_count',
+            'average_cooking_time'
         )
 
     def get_is_subscribed(self, obj):
@@ -335,13 +489,13 @@ class SubscriptionsRecipesSerializer(serializers.ModelSerializer):
         except KeyError:
             return False
 
-    def get_recipes_count(self, obj):
-        return obj.user.recipes.count()
-
 
 class UserWithRecipeSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = AuthorStatsField('recipes_count')
+    followers_count = AuthorStatsField('followers_count')
+    favorites_count = AuthorStatsField('favorites_count')
+    average_cooking_time = AuthorStatsField('average_cooking_time')
     recipes = ShortRecipeSerializerForSubscriptions(many=True)
 
     class Meta:
@@ -354,7 +508,10 @@ class UserWithRecipeSerializer(serializers.ModelSerializer):
             'last_name',
             'is_subscribed',
             'recipes',
-            'recipes_count'
+            'recipes_count',
+            'followers_count',
+            'favorites_count',
+            'average_cooking_time'
         )
 
     def get_is_subscribed(self, obj):
@@ -367,8 +524,39 @@ class UserWithRecipeSerializer(serializers.ModelSerializer):
         except KeyError:
             return False
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
+
+class JobSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'name', 'status', 'attempts', 'result', 'created',
+            'updated'
+        )
+        read_only_fields = fields
+
+
+class MealPlanSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = MealPlan
+        fields = ('id', 'name', 'version')
+        read_only_fields = ('version',)
+
+
+class MealPlanEntrySerializer(serializers.ModelSerializer):
+    plan = serializers.PrimaryKeyRelatedField(queryset=MealPlan.objects.none())
+
+    class Meta:
+        model = MealPlanEntry
+        fields = ('id', 'plan', 'recipe', 'date', 'servings')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated:
+            fields['plan'].queryset = request.user.meal_plans.all()
+        return fields
 
 
 class SetPasswordSerializer(serializers.Serializer):
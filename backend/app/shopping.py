@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Sum
+
+from .models import RecipeIngredient
+from .units import canonical, humanize
+
+MEAL_PLAN_KEY = 'meal_plan:%s:%s:%s:%s:%s:%s'
+
+
+def aggregate_ingredients(recipes):
+    """Суммы ингредиентов рецептов в канонических единицах.
+
+    Количества складываются в базе одним запросом с группировкой по
+    названию и единице, а пересчёт единиц идёт уже по сгруппированным
+    строкам, которых не больше, чем разных ингредиентов.
+    """
+    rows = (
+        RecipeIngredient.objects.filter(recipe__in=recipes)
+        .values_list('ingredient__name', 'ingredient__measurement_unit')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    return merge_units(rows)
+
+
+def merge_units(rows):
+    """Сводит строки (название, единица, сумма) к каноническим единицам."""
+    totals = {}
+    for name, unit, total in rows:
+        unit, factor = canonical(unit)
+        key = (name, unit)
+        totals[key] = totals.get(key, 0) + total * factor
+    return [
+        (name, *humanize(amount, unit))
+        for (name, unit), amount in sorted(totals.items())
+    ]
+
+
+def aggregate_meal_plan(entries):
+    """Суммы ингредиентов записей плана с учётом множителя порций.
+
+    Один сгруппированный запрос от записей плана к ингредиентам их
+    рецептов, количество каждой строки умножается на порции записи.
+    """
+    rows = (
+        entries.filter(recipe__ingredients_in__isnull=False)
+        .values_list(
+            'recipe__ingredients_in__ingredient__name',
+            'recipe__ingredients_in__ingredient__measurement_unit')
+        .annotate(total=Sum(
+            F('recipe__ingredients_in__amount') * F('servings')))
+        .order_by()
+    )
+    return merge_units(rows)
+
+
+def plan_entries(plan, start=None, end=None):
+    entries = plan.entries.all()
+    if start is not None:
+        entries = entries.filter(date__gte=start)
+    if end is not None:
+        entries = entries.filter(date__lte=end)
+    return entries
+
+
+def build_meal_plan_list(plan, start=None, end=None):
+    """Список покупок плана за период, кешируется до изменения плана.
+
+    Версия плана меняется при правке записей, а изменение и удаление
+    рецептов плана учитывается по их числу и дате последнего изменения.
+    """
+    entries = plan_entries(plan, start, end)
+    state = entries.aggregate(
+        count=Count('id'), updated=Max('recipe__updated_at'))
+    key = MEAL_PLAN_KEY % (
+        plan.pk, plan.version, start, end, state['count'],
+        state['updated'] and state['updated'].timestamp())
+    text = cache.get(key)
+    if text is None:
+        text = render_list(
+            (
+                f'{date} {name} x{servings:g}'
+                for date, name, servings in entries.values_list(
+                    'date', 'recipe__name', 'servings')
+            ),
+            aggregate_meal_plan(entries),
+        )
+        cache.set(key, text, settings.MEAL_PLAN_CACHE_TIMEOUT)
+    return text
+
+
+def render_list(recipes, ingredients):
+    nl = '\n'
+    ingredients = [
+        f'{name} - {amount} {unit}'.rstrip()
+        for name, amount, unit in ingredients
+    ]
+    return f'Рецепты:{nl}{nl.join(recipes)}{nl}' \
+           f'Ингредиенты:{nl}{nl.join(ingredients)}'
+
+
+def build_shopping_list(user):
+    recipes = [
+        f'{name} - {cooking_time} мин.'
+        for name, cooking_time in user.shoppings.values_list(
+            'recipe__name', 'recipe__cooking_time')
+    ]
+    ingredients = aggregate_ingredients(user.shoppings.values('recipe'))
+    return render_list(recipes, ingredients)
@@ -0,0 +1,59 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .compression import drop_catalog
+from .jobs import enqueue
+from .models import Ingredient, Recipe, Tag, User
+
+# Изменение тега, ингредиента или автора затрагивает все его рецепты,
+# поэтому документы пересобираются в фоне, а не внутри запроса.
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, **kwargs):
+    if not created:
+        enqueue('rebuild_documents', {'tags': instance.pk})
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(sender, instance, created, **kwargs):
+    if not created:
+        enqueue('rebuild_documents', {'ingredients': instance.pk})
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, update_fields, **kwargs):
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    if instance.recipes.exists():
+        enqueue('rebuild_documents', {'author': instance.pk})
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_affected_recipes(sender, instance, **kwargs):
+    lookup = 'tags' if sender is Tag else 'ingredients'
+    instance._affected_recipes = list(
+        Recipe.objects.filter(**{lookup: instance})
+        .values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def rebuild_affected_recipes(sender, instance, **kwargs):
+    affected = getattr(instance, '_affected_recipes', [])
+    if affected:
+        enqueue('rebuild_documents', {'recipe_ids': affected})
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def drop_tags_catalog(sender, **kwargs):
+    drop_catalog('tags')
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def drop_ingredients_catalog(sender, **kwargs):
+    drop_catalog('ingredients')
@@ -0,0 +1,290 @@
+"""Индекс похожих рецептов.
+
+Рецепт описывается разреженным вектором ингредиентов и тегов с весами
+idf, сходство считается косинусом. Для каждого рецепта хранятся
+SIMILAR_RECIPES_COUNT ближайших соседей, поэтому ответ на запрос
+похожих рецептов и рекомендаций требует одного чтения индекса.
+NumPy и SciPy импортируются только при построении индекса.
+
+Веса idf и длины векторов сохраняются при построении, и сохранённый
+рецепт сравнивается только с рецептами, у которых есть общий
+ингредиент: общий тег есть почти у всех рецептов, и кандидатами
+оказался бы весь каталог.
+"""
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import FeatureWeight, Recipe, RecipeIngredient, SimilarRecipes
+
+TAG_WEIGHT = 0.5
+BLOCK_SIZE = 500
+
+
+def feature_matrix():
+    """Нормированная матрица признаков рецептов.
+
+    Возвращает id рецептов по возрастанию, матрицу, длины строк до
+    нормирования и веса idf признаков.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    recipe_ids = np.fromiter(
+        Recipe.objects.order_by('id').values_list('id', flat=True),
+        dtype=np.int64)
+    ingredients = np.array(list(
+        RecipeIngredient.objects.values_list('recipe_id', 'ingredient_id')
+    ), dtype=np.int64).reshape(-1, 2)
+    tags = np.array(list(
+        Recipe.tags.through.objects.values_list('recipe_id', 'tag_id')
+    ), dtype=np.int64).reshape(-1, 2)
+    ingredients = ingredients[np.isin(ingredients[:, 0], recipe_ids)]
+    tags = tags[np.isin(tags[:, 0], recipe_ids)]
+
+    ingredient_ids, ingredient_columns = np.unique(
+        ingredients[:, 1], return_inverse=True)
+    tag_ids, tag_columns = np.unique(tags[:, 1], return_inverse=True)
+    offset = ingredient_columns.max(initial=-1) + 1
+    rows = np.searchsorted(
+        recipe_ids, np.concatenate((ingredients[:, 0], tags[:, 0])))
+    columns = np.concatenate((ingredient_columns, tag_columns + offset))
+    weights = np.concatenate((
+        np.ones(len(ingredient_columns)),
+        np.full(len(tag_columns), TAG_WEIGHT),
+    ))
+    shape = (len(recipe_ids), offset + tag_columns.max(initial=-1) + 1)
+    matrix = sparse.csr_matrix((weights, (rows, columns)), shape=shape)
+
+    frequency = np.bincount(columns, minlength=shape[1])
+    idf = np.log((1 + shape[0]) / (1 + frequency)) + 1
+    matrix = matrix.multiply(idf).tocsr()
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    weights = [
+        FeatureWeight(kind=kind, feature_id=int(feature_id), idf=float(value))
+        for kind, feature_ids, values in (
+            (FeatureWeight.INGREDIENT, ingredient_ids, idf[:offset]),
+            (FeatureWeight.TAG, tag_ids, idf[offset:]),
+        )
+        for feature_id, value in zip(feature_ids, values)
+    ]
+    scale = np.where(norms == 0, 1, norms)
+    return recipe_ids, sparse.diags(1 / scale) @ matrix, norms, weights
+
+
+def top_neighbours(indices, scores, own, limit):
+    import numpy as np
+
+    keep = indices != own
+    indices, scores = indices[keep], scores[keep]
+    if len(scores) > limit:
+        best = np.argpartition(-scores, limit)[:limit]
+        indices, scores = indices[best], scores[best]
+    order = np.argsort(-scores, kind='stable')
+    return indices[order], scores[order]
+
+
+def build_index(limit=None, block_size=BLOCK_SIZE):
+    """Пересчитывает соседей всех рецептов блоками строк."""
+    limit = limit or settings.SIMILAR_RECIPES_COUNT
+    recipe_ids, matrix, norms, weights = feature_matrix()
+    transposed = matrix.T.tocsc()
+    for start in range(0, len(recipe_ids), block_size):
+        similarity = (matrix[start:start + block_size] @ transposed).tocsr()
+        rows = []
+        for offset in range(similarity.shape[0]):
+            begin, end = similarity.indptr[offset:offset + 2]
+            indices, scores = top_neighbours(
+                similarity.indices[begin:end], similarity.data[begin:end],
+                start + offset, limit)
+            rows.append(SimilarRecipes(
+                recipe_id=int(recipe_ids[start + offset]),
+                neighbours=recipe_ids[indices].tolist(),
+                scores=scores.round(4).tolist(),
+                norm=float(norms[start + offset]),
+            ))
+        with transaction.atomic():
+            SimilarRecipes.objects.filter(
+                recipe_id__in=[row.recipe_id for row in rows]).delete()
+            SimilarRecipes.objects.bulk_create(rows)
+    with transaction.atomic():
+        FeatureWeight.objects.all().delete()
+        FeatureWeight.objects.bulk_create(weights, batch_size=BLOCK_SIZE)
+    return len(recipe_ids)
+
+
+def stored_idf(features):
+    """Веса idf из последнего build_index.
+
+    Признак, которого тогда не было ни у одного рецепта, получает вес
+    самого редкого признака.
+    """
+    kinds = defaultdict(list)
+    for kind, feature_id in features:
+        kinds[kind].append(feature_id)
+    query = Q(pk__in=[])
+    for kind, feature_ids in kinds.items():
+        query |= Q(kind=kind, feature_id__in=feature_ids)
+    idf = {
+        (kind, feature_id): value
+        for kind, feature_id, value in FeatureWeight.objects.filter(
+            query).values_list('kind', 'feature_id', 'idf')
+    }
+    missing = set(features) - set(idf)
+    if missing:
+        rarest = math.log((1 + Recipe.objects.count()) / 2) + 1
+        idf.update(dict.fromkeys(missing, rarest))
+    return idf
+
+
+def recipe_vectors(recipe_ids):
+    """Векторы признаков рецептов с сохранёнными весами idf."""
+    vectors = defaultdict(dict)
+    ingredients = RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids).values_list('recipe_id', 'ingredient_id')
+    for recipe_id, ingredient_id in ingredients:
+        vectors[recipe_id][(FeatureWeight.INGREDIENT, ingredient_id)] = 1.0
+    tags = Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids).values_list('recipe_id', 'tag_id')
+    for recipe_id, tag_id in tags:
+        vectors[recipe_id][(FeatureWeight.TAG, tag_id)] = TAG_WEIGHT
+    idf = stored_idf({
+        feature for vector in vectors.values() for feature in vector})
+    return {
+        recipe_id: {
+            feature: weight * idf[feature]
+            for feature, weight in vector.items()
+        }
+        for recipe_id, vector in vectors.items()
+    }
+
+
+def vector_norm(vector):
+    return math.sqrt(sum(weight * weight for weight in vector.values()))
+
+
+def shared_ingredients(vector, recipe_id):
+    """Связи других рецептов с ингредиентами из vector."""
+    return RecipeIngredient.objects.filter(
+        ingredient_id__in=[
+            feature_id for kind, feature_id in vector
+            if kind == FeatureWeight.INGREDIENT
+        ]
+    ).exclude(recipe_id=recipe_id)
+
+
+def needs_neighbour(neighbours, scores, recipe_id, score, limit):
+    """Меняет ли рецепт со сходством score список соседей другого."""
+    if recipe_id in neighbours:
+        return scores[neighbours.index(recipe_id)] != score
+    return len(scores) < limit or score > scores[limit - 1]
+
+
+def refresh_recipe(recipe_id, limit=None):
+    """Обновляет соседей рецепта и его место в списках других рецептов.
+
+    Вектор рецепта строится с весами idf последнего build_index и
+    сравнивается только с рецептами, у которых есть общий ингредиент,
+    соседей только по тегу находит build_index. Список другого рецепта
+    меняется, только если этот рецепт уже в нём или обходит его
+    последнего соседа. Рецепты, которые после изменения перестали
+    пересекаться с этим, сохраняют его в списке до следующего
+    build_index.
+    """
+    limit = limit or settings.SIMILAR_RECIPES_COUNT
+    if not Recipe.objects.filter(id=recipe_id).exists():
+        return 0
+    vector = recipe_vectors([recipe_id]).get(recipe_id, {})
+    norm = vector_norm(vector)
+    ingredients = shared_ingredients(vector, recipe_id)
+    candidates = ingredients.values('recipe_id')
+
+    products = defaultdict(float)
+    for other, feature_id in ingredients.values_list(
+            'recipe_id', 'ingredient_id').distinct():
+        weight = vector[(FeatureWeight.INGREDIENT, feature_id)]
+        products[other] += weight * weight
+    tags = Recipe.tags.through.objects.filter(
+        recipe_id__in=candidates,
+        tag_id__in=[
+            feature_id for kind, feature_id in vector
+            if kind == FeatureWeight.TAG
+        ],
+    )
+    for other, tag_id in tags.values_list('recipe_id', 'tag_id'):
+        weight = vector[(FeatureWeight.TAG, tag_id)]
+        products[other] += weight * weight
+    rows = {
+        other: (neighbours, scores, other_norm)
+        for other, neighbours, scores, other_norm
+        in SimilarRecipes.objects.filter(recipe__in=candidates).values_list(
+            'recipe_id', 'neighbours', 'scores', 'norm')
+    }
+    norms = {other: row[2] for other, row in rows.items() if row[2]}
+    unindexed = [other for other in products if other not in norms]
+    for other, other_vector in recipe_vectors(unindexed).items():
+        norms[other] = vector_norm(other_vector)
+    score_of = {
+        other: round(product / (norm * norms[other]), 4)
+        for other, product in products.items() if norms.get(other)
+    }
+    stale = [
+        other for other, (neighbours, scores, _) in rows.items()
+        if other in score_of and needs_neighbour(
+            neighbours, scores, recipe_id, score_of[other], limit)
+    ]
+
+    ranked = sorted(score_of.items(), key=lambda pair: (-pair[1], pair[0]))
+    with transaction.atomic():
+        locked = {
+            row.recipe_id: row
+            for row in SimilarRecipes.objects.select_for_update().filter(
+                recipe_id__in=[recipe_id, *stale]).order_by('recipe_id')
+        }
+        own = locked.pop(recipe_id, None) or SimilarRecipes(
+            recipe_id=recipe_id)
+        own.neighbours = [other for other, _ in ranked[:limit]]
+        own.scores = [score for _, score in ranked[:limit]]
+        own.norm = norm
+        own.save()
+
+        changed = []
+        for other, row in locked.items():
+            score = score_of[other]
+            if not needs_neighbour(
+                    row.neighbours, row.scores, recipe_id, score, limit):
+                continue
+            pairs = dict(zip(row.neighbours, row.scores))
+            pairs[recipe_id] = score
+            ranked = sorted(pairs.items(), key=lambda pair: -pair[1])[:limit]
+            row.neighbours = [neighbour for neighbour, _ in ranked]
+            row.scores = [score for _, score in ranked]
+            changed.append(row)
+        SimilarRecipes.objects.bulk_update(
+            changed, ['neighbours', 'scores'], batch_size=BLOCK_SIZE)
+    return len(changed) + 1
+
+
+def similar_ids(recipe_id, limit):
+    neighbours = (
+        SimilarRecipes.objects.filter(recipe_id=recipe_id)
+        .values_list('neighbours', flat=True).first()
+    )
+    return (neighbours or [])[:limit]
+
+
+def recommended_ids(user, limit):
+    """Рецепты, похожие на избранное пользователя, кроме него самого."""
+    favorites = set(user.favorites.values_list('recipe_id', flat=True))
+    totals = defaultdict(float)
+    rows = SimilarRecipes.objects.filter(
+        recipe_id__in=favorites).values_list('neighbours', 'scores')
+    for neighbours, scores in rows:
+        for neighbour, score in zip(neighbours, scores):
+            if neighbour not in favorites:
+                totals[neighbour] += score
+    ranked = sorted(totals.items(), key=lambda pair: -pair[1])
+    return [recipe_id for recipe_id, _ in ranked[:limit]]
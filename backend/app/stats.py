@@ -0,0 +1,94 @@
+"""Счётчики авторов: рецепты, подписчики и добавления в избранное.
+
+Счётчики сдвигаются там же, где создаются и удаляются рецепты,
+подписки и избранное. Удаление пачками и правки в админке не сдвигают
+счётчики, а пересчитывают их у затронутых авторов, так что повтор
+задачи не вычитает дважды. Остальные расхождения исправляет
+rebuild_stats.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest
+
+from .models import AuthorStats, Favorite, Recipe, Subscribe, User
+
+BATCH_SIZE = 1000
+
+
+def change_stats(author_id, **deltas):
+    """Сдвигает счётчики автора, создавая запись при первом обращении."""
+    updates = {
+        field: Greatest(F(field) + delta, Value(0))
+        for field, delta in deltas.items() if delta
+    }
+    if not updates:
+        return
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if not stats.update(**updates):
+        AuthorStats.objects.get_or_create(author_id=author_id)
+        stats.update(**updates)
+
+
+def recipe_added(recipe):
+    change_stats(
+        recipe.author_id,
+        recipes_count=1,
+        cooking_time_total=recipe.cooking_time
+    )
+
+
+def count_stats(recipes, subscriptions, favorites):
+    """Счётчики авторов по выборкам рецептов, подписок и избранного."""
+    stats = {}
+
+    def get(author_id):
+        if author_id not in stats:
+            stats[author_id] = AuthorStats(author_id=author_id)
+        return stats[author_id]
+
+    rows = recipes.values('author').annotate(
+        count=Count('id'), total=Sum('cooking_time')).order_by()
+    for row in rows:
+        get(row['author']).recipes_count = row['count']
+        get(row['author']).cooking_time_total = row['total']
+    rows = subscriptions.values('author').annotate(
+        count=Count('id')).order_by()
+    for row in rows:
+        get(row['author']).followers_count = row['count']
+    rows = favorites.values('recipe__author').annotate(
+        count=Count('id')).order_by()
+    for row in rows:
+        get(row['recipe__author']).favorites_count = row['count']
+    return stats
+
+
+def recount_authors(author_ids):
+    """Пересчитывает счётчики указанных авторов по текущим данным."""
+    author_ids = set(User.objects.filter(
+        pk__in=set(author_ids)).values_list('pk', flat=True))
+    if not author_ids:
+        return
+    stats = count_stats(
+        Recipe.objects.filter(author__in=author_ids),
+        Subscribe.objects.filter(author__in=author_ids),
+        Favorite.objects.filter(recipe__author__in=author_ids),
+    )
+    for author_id in author_ids:
+        row = stats.get(author_id, AuthorStats(author_id=author_id))
+        AuthorStats.objects.update_or_create(author_id=author_id, defaults={
+            field: getattr(row, field) for field in (
+                'recipes_count', 'followers_count', 'favorites_count',
+                'cooking_time_total',
+            )
+        })
+
+
+def rebuild_stats(batch_size=BATCH_SIZE):
+    """Пересчитывает счётчики всех авторов с нуля."""
+    stats = count_stats(
+        Recipe.objects.all(), Subscribe.objects.all(), Favorite.objects.all())
+    with transaction.atomic():
+        AuthorStats.objects.all().delete()
+        AuthorStats.objects.bulk_create(
+            stats.values(), batch_size=batch_size)
+    return len(stats)
@@ -0,0 +1,122 @@
+"""ASGI-приложение потока событий /api/events/ (server-sent events).
+
+Работает напрямую с ASGI, без обработки запроса Django, поэтому
+открытое соединение не занимает поток. Клиент передаёт заголовок
+Authorization: Token <ключ> или, как EventSource, который не умеет
+отправлять заголовки, параметр ?ticket= с билетом из
+POST /api/events/ticket/. Билет живёт EVENTS_TICKET_MAX_AGE секунд,
+поэтому попавший в журналы адрес не даёт постоянного доступа.
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.authtoken.models import Token
+
+from .events import get_broker, read_ticket
+from .models import User
+
+PATH = '/api/events/'
+
+
+def get_token(scope):
+    for name, value in scope['headers']:
+        if name == b'authorization':
+            keyword, _, key = value.decode('latin1').partition(' ')
+            if keyword == 'Token':
+                return key.strip()
+    return None
+
+
+def get_ticket(scope):
+    query = parse_qs(scope.get('query_string', b'').decode('latin1'))
+    return query.get('ticket', [None])[0]
+
+
+@sync_to_async
+def get_user_id(scope):
+    key = get_token(scope)
+    if key:
+        return (
+            Token.objects.filter(key=key, user__is_active=True)
+            .values_list('user_id', flat=True).first()
+        )
+    ticket = get_ticket(scope)
+    user_id = read_ticket(ticket) if ticket else None
+    if user_id is None:
+        return None
+    return (
+        User.objects.filter(pk=user_id, is_active=True)
+        .values_list('pk', flat=True).first()
+    )
+
+
+def format_event(event):
+    data = json.dumps(event, ensure_ascii=False)
+    return f'event: {event["type"]}\ndata: {data}\n\n'.encode()
+
+
+async def reject(send, status, message):
+    body = json.dumps({'detail': message}, ensure_ascii=False).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def events_application(scope, receive, send):
+    if scope['method'] != 'GET':
+        return await reject(send, 405, 'Метод не разрешён.')
+    user_id = await get_user_id(scope)
+    if user_id is None:
+        return await reject(send, 401, 'Нужен действительный токен или билет.')
+
+    broker = get_broker()
+    queue = broker.subscribe(user_id)
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b': connected\n\n',
+            'more_body': True,
+        })
+        while not disconnected.done():
+            received = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                (received, disconnected),
+                timeout=settings.EVENTS_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED)
+            if received in done:
+                body = format_event(received.result())
+            else:
+                received.cancel()
+                body = b': ping\n\n'
+            if not disconnected.done():
+                await send({
+                    'type': 'http.response.body',
+                    'body': body,
+                    'more_body': True,
+                })
+    finally:
+        disconnected.cancel()
+        broker.unsubscribe(user_id, queue)
+
+
+async def wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
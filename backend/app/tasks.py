@@ -0,0 +1,52 @@
+from .deletion import purge_recipe, purge_user
+from .documents import rebuild_documents
+from .feed import fan_out_recipe, make_light
+from .jobs import task
+from .models import Recipe, User
+from .shopping import build_shopping_list
+from .similarity import refresh_recipe
+
+
+@task('shopping_list')
+def shopping_list(user_id):
+    user = User.objects.get(pk=user_id)
+    return {'text': build_shopping_list(user)}
+
+
+@task('delete_recipe')
+def delete_recipe(recipe_id):
+    return {'deleted': purge_recipe(recipe_id)}
+
+
+@task('delete_user')
+def delete_user(user_id):
+    return {'deleted': purge_user(user_id)}
+
+
+@task('rebuild_documents')
+def rebuild_recipe_documents(recipe_ids=None, **lookup):
+    recipes = Recipe.objects.filter(**lookup)
+    if recipe_ids is not None:
+        recipes = recipes.filter(id__in=recipe_ids)
+    return {'rebuilt': rebuild_documents(recipes)}
+
+
+@task('refresh_similar')
+def refresh_similar(recipe_id=None, recipe_ids=None):
+    if recipe_ids is None:
+        recipe_ids = [recipe_id]
+    return {'updated': sum(
+        refresh_recipe(recipe_id) for recipe_id in recipe_ids)}
+
+
+@task('fan_out_recipes')
+def fan_out_recipes(recipe_ids):
+    recipes = Recipe.objects.filter(id__in=recipe_ids).order_by('id')
+    for recipe in recipes.iterator():
+        fan_out_recipe(recipe)
+    return {'recipes': len(recipe_ids)}
+
+
+@task('make_author_light')
+def make_author_light(author_id):
+    return {'changed': make_light(author_id)}
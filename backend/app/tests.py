@@ -0,0 +1,97 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import (APIClient, APIRequestFactory, APITestCase,
+                                 force_authenticate)
+
+from .documents import rebuild_documents
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     Shopping, Subscribe, Tag, User)
+from .serializers import RecipeSerializer
+
+
+class RecipeDocumentParityTests(APITestCase):
+    """Ответ из документа совпадает с прежним ответом сериализатора."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(
+            'alice', 'alice@example.com', 'pass12345',
+            first_name='Алиса', last_name='Иванова')
+        cls.bob = User.objects.create_user(
+            'bob', 'bob@example.com', 'pass12345',
+            first_name='Борис', last_name='Петров')
+        breakfast = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast')
+        lunch = Tag.objects.create(
+            name='Обед', color='#49B64E', slug='lunch')
+        flour = Ingredient.objects.create(
+            name='мука', measurement_unit='г', calories=364, proteins=10.3,
+            fats=1, carbohydrates=76.1)
+        milk = Ingredient.objects.create(
+            name='молоко', measurement_unit='мл')
+        salt = Ingredient.objects.create(
+            name='соль', measurement_unit='по вкусу')
+        pancakes = cls.create_recipe(
+            cls.alice, 'Блины', [breakfast],
+            [(flour, 200), (milk, 500), (salt, 0.5)])
+        soup = cls.create_recipe(
+            cls.bob, 'Суп', [lunch, breakfast], [(salt, 1.25)])
+        cls.create_recipe(cls.bob, 'Хлеб', [], [(flour, 450)])
+        Favorite.objects.create(user=cls.alice, recipe=soup)
+        Shopping.objects.create(user=cls.alice, recipe=soup)
+        Shopping.objects.create(user=cls.alice, recipe=pancakes)
+        Subscribe.objects.create(user=cls.alice, author=cls.bob)
+        rebuild_documents()
+
+    @staticmethod
+    def create_recipe(author, name, tags, ingredients):
+        recipe = Recipe.objects.create(
+            author=author, name=name, text=f'{name}: как приготовить',
+            image=f'recipes/images/{author.username}.png', cooking_time=15)
+        recipe.tags.set(tags)
+        for ingredient, amount in ingredients:
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=amount)
+        return recipe
+
+    def legacy_render(self, recipe_id, user=None, path='/api/recipes/'):
+        """Ответ сериализатора без документа, как до его появления."""
+        request = APIRequestFactory().get(path)
+        if user is not None:
+            force_authenticate(request, user=user)
+        recipe = Recipe.objects.get(pk=recipe_id)
+        recipe.document = None
+        serializer = RecipeSerializer(
+            recipe, context={'request': Request(request)})
+        return JSONRenderer().render(serializer.data)
+
+    def assert_parity(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user=user)
+        recipes = Recipe.objects.order_by('id')
+        self.assertTrue(all(recipe.document for recipe in recipes))
+        response = client.get('/api/recipes/', {'limit': 10})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), recipes.count())
+        renderer = JSONRenderer()
+        for item in results:
+            self.assertEqual(
+                renderer.render(item),
+                self.legacy_render(item['id'], user))
+        for recipe in recipes:
+            path = f'/api/recipes/{recipe.id}/'
+            response = client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.content, self.legacy_render(recipe.id, user, path))
+
+    def test_anonymous(self):
+        self.assert_parity()
+
+    def test_authenticated(self):
+        self.assert_parity(self.alice)
+
+    def test_authenticated_without_marks(self):
+        self.assert_parity(self.bob)
@@ -0,0 +1,110 @@
+import hashlib
+import math
+import time
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Корзина токенов: rate '10/min' даёт 10 запросов подряд
+    и пополнение на один токен каждые 6 секунд.
+
+    Проверка стоит одно чтение и одну запись в кэш THROTTLE_CACHE.
+    Кэш должен быть общим для всех воркеров (по умолчанию таблица
+    в базе, можно memcached), иначе каждый процесс считает свой лимит.
+    """
+    scope = None
+    THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+    cache_format = 'bucket_%(scope)s_%(ident)s'
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+        self.wait_seconds = None
+
+    def get_rate(self, view):
+        return self.THROTTLE_RATES.get(self.scope)
+
+    def parse_rate(self, rate):
+        num, period = rate.split('/')
+        duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+        return int(num), int(num) / duration
+
+    def get_ident_key(self, request, view):
+        raise NotImplementedError('.get_ident_key() must be overridden')
+
+    def allow_request(self, request, view):
+        rate = self.get_rate(view)
+        if rate is None:
+            return True
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+        capacity, refill = self.parse_rate(rate)
+        key = self.cache_format % {'scope': self.scope, 'ident': ident}
+        now = time.time()
+        tokens, stamp = self.cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * refill)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / refill
+            return False
+        self.cache.set(key, (tokens - 1, now), math.ceil(capacity / refill))
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserBucketThrottle(TokenBucketThrottle):
+    scope = 'user'
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class AnonBucketThrottle(TokenBucketThrottle):
+    scope = 'anon'
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.get_ident(request)
+
+
+class ScopedBucketThrottle(TokenBucketThrottle):
+    """Лимит на группу эндпоинтов, заданную throttle_scope у view."""
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        if not self.scope:
+            return True
+        return super().allow_request(request, view)
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return self.get_ident(request)
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = 'login'
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginEmailThrottle(TokenBucketThrottle):
+    scope = 'login_email'
+
+    def get_ident_key(self, request, view):
+        if not isinstance(request.data, Mapping):
+            return self.get_ident(request)
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email:
+            return None
+        return hashlib.sha1(email.strip().lower().encode()).hexdigest()
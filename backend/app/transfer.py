@@ -0,0 +1,177 @@
+"""Перенос рецептов между окружениями в формате JSON Lines.
+
+Одна строка файла описывает один рецепт. Автор, теги и ингредиенты
+записываются естественными ключами (username, slug, название и единица
+измерения), изображение передаётся путём внутри MEDIA_ROOT, сами файлы
+копируются отдельно.
+"""
+import json
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .compression import drop_catalog
+from .documents import rebuild_documents
+from .jobs import enqueue
+from .models import Ingredient, Recipe, RecipeIngredient, Tag, User
+from .stats import change_stats
+
+BATCH_SIZE = 1000
+
+
+def export_recipes(output, batch_size=BATCH_SIZE):
+    """Пишет рецепты в output пачками, не загружая модели целиком."""
+    exported = 0
+    last_id = 0
+    while True:
+        recipes = list(
+            Recipe.objects.filter(id__gt=last_id).order_by('id')
+            .values('id', 'author__username', 'name', 'text',
+                    'cooking_time', 'image')[:batch_size]
+        )
+        if not recipes:
+            return exported
+        ids = [recipe['id'] for recipe in recipes]
+        ingredients, tags = {}, {}
+        rows = RecipeIngredient.objects.filter(recipe_id__in=ids).values_list(
+            'recipe_id', 'ingredient__name', 'ingredient__measurement_unit',
+            'amount').order_by('id')
+        for recipe_id, name, unit, amount in rows:
+            ingredients.setdefault(recipe_id, []).append({
+                'name': name, 'measurement_unit': unit, 'amount': amount})
+        rows = Recipe.tags.through.objects.filter(
+            recipe_id__in=ids).values_list('recipe_id', 'tag__slug')
+        for recipe_id, slug in rows:
+            tags.setdefault(recipe_id, []).append(slug)
+        for recipe in recipes:
+            output.write(json.dumps({
+                'id': recipe['id'],
+                'author': recipe['author__username'],
+                'name': recipe['name'],
+                'text': recipe['text'],
+                'cooking_time': recipe['cooking_time'],
+                'image': recipe['image'],
+                'tags': tags.get(recipe['id'], []),
+                'ingredients': ingredients.get(recipe['id'], []),
+            }, ensure_ascii=False) + '\n')
+        exported += len(recipes)
+        last_id = ids[-1]
+
+
+class Importer:
+    """Загружает рецепты пачками, каждая пачка в своей транзакции.
+
+    Справочники читаются в словари один раз, недостающие ингредиенты
+    создаются. Рецепты неизвестных авторов и неизвестные теги
+    пропускаются и попадают в счётчики skipped.
+
+    bulk_create не отправляет сигналы, поэтому кэш ингредиентов
+    сбрасывается явно, а похожие рецепты и ленты подписчиков каждой
+    пачки обновляют задачи фонового воркера. После большого импорта
+    индекс похожих рецептов лучше пересобрать build_similarity_index.
+    """
+
+    def __init__(self, chunk_size=BATCH_SIZE):
+        self.chunk_size = chunk_size
+        self.users = dict(User.objects.values_list('username', 'id'))
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = {
+            (name, unit): pk for pk, name, unit in
+            Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+        }
+        self.ids = {}
+        self.imported = 0
+        self.skipped_recipes = 0
+        self.skipped_tags = 0
+
+    def run(self, lines):
+        records = (json.loads(line) for line in lines if line.strip())
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                return self.imported
+            with transaction.atomic():
+                self.import_chunk(chunk)
+
+    def import_chunk(self, chunk):
+        records = [
+            record for record in chunk if record['author'] in self.users]
+        self.skipped_recipes += len(chunk) - len(records)
+        self.create_missing_ingredients(records)
+        recipes = [
+            Recipe(
+                author_id=self.users[record['author']],
+                name=record['name'],
+                text=record['text'],
+                cooking_time=record['cooking_time'],
+                image=record['image'],
+                ingredients_count=len(record['ingredients']),
+            )
+            for record in records
+        ]
+        self.create_recipes(recipes)
+        links, tag_links = [], []
+        for record, recipe in zip(records, recipes):
+            if 'id' in record:
+                self.ids[record['id']] = recipe.id
+            for item in record['ingredients']:
+                links.append(RecipeIngredient(
+                    recipe_id=recipe.id,
+                    ingredient_id=self.ingredients[
+                        item['name'], item['measurement_unit']],
+                    amount=item['amount'],
+                ))
+            for slug in record['tags']:
+                if slug not in self.tags:
+                    self.skipped_tags += 1
+                    continue
+                tag_links.append(Recipe.tags.through(
+                    recipe_id=recipe.id, tag_id=self.tags[slug]))
+        RecipeIngredient.objects.bulk_create(links, batch_size=BATCH_SIZE)
+        Recipe.tags.through.objects.bulk_create(
+            tag_links, batch_size=BATCH_SIZE)
+        ids = [recipe.id for recipe in recipes]
+        rebuild_documents(Recipe.objects.filter(id__in=ids))
+        self.count_authors(recipes)
+        if ids:
+            enqueue('refresh_similar', {'recipe_ids': ids})
+            enqueue('fan_out_recipes', {'recipe_ids': ids})
+        self.imported += len(recipes)
+
+    def count_authors(self, recipes):
+        totals = {}
+        for recipe in recipes:
+            count, cooking_time = totals.get(recipe.author_id, (0, 0))
+            totals[recipe.author_id] = (
+                count + 1, cooking_time + recipe.cooking_time)
+        for author_id, (count, cooking_time) in totals.items():
+            change_stats(
+                author_id,
+                recipes_count=count,
+                cooking_time_total=cooking_time
+            )
+
+    def create_missing_ingredients(self, records):
+        missing = {
+            (item['name'], item['measurement_unit'])
+            for record in records for item in record['ingredients']
+        } - self.ingredients.keys()
+        if not missing:
+            return
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in missing
+        )
+        drop_catalog('ingredients')
+        rows = Ingredient.objects.filter(
+            name__in={name for name, _ in missing}
+        ).values_list('id', 'name', 'measurement_unit')
+        self.ingredients.update(
+            ((name, unit), pk) for pk, name, unit in rows)
+
+    def create_recipes(self, recipes):
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes, batch_size=BATCH_SIZE)
+            return
+        for recipe in recipes:
+            recipe.save()
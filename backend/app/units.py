@@ -0,0 +1,66 @@
+"""Приведение единиц измерения к каноническим.
+
+Таблица пересчёта собирается один раз при импорте. Единицы, которых нет
+в таблице, считаются самостоятельными и складываются только между собой.
+"""
+import re
+
+GRAM = 'г'
+MILLILITER = 'мл'
+PIECE = 'шт.'
+
+# единица: (каноническая единица, множитель)
+CONVERSIONS = {
+    'мг': (GRAM, 0.001),
+    'г': (GRAM, 1),
+    'кг': (GRAM, 1000),
+    'мл': (MILLILITER, 1),
+    'л': (MILLILITER, 1000),
+    'капля': (MILLILITER, 0.05),
+    'ч. л.': (MILLILITER, 5),
+    'ст. л.': (MILLILITER, 15),
+    'стакан': (MILLILITER, 250),
+    'шт.': (PIECE, 1),
+}
+
+ALIASES = {
+    'гр': 'г',
+    'грамм': 'г',
+    'кило': 'кг',
+    'литр': 'л',
+    'шт': 'шт.',
+    'штука': 'шт.',
+    'ч.л.': 'ч. л.',
+    'ст.л.': 'ст. л.',
+}
+
+# Крупная единица для вывода, если количество её превышает.
+DISPLAY = {
+    GRAM: ('кг', 1000),
+    MILLILITER: ('л', 1000),
+}
+
+_spaces = re.compile(r'\s+')
+
+
+def normalize_unit(unit):
+    unit = _spaces.sub(' ', unit.strip().lower())
+    return ALIASES.get(unit, unit)
+
+
+def canonical(unit):
+    """Каноническая единица и множитель пересчёта для unit."""
+    unit = normalize_unit(unit)
+    return CONVERSIONS.get(unit, (unit, 1))
+
+
+def humanize(amount, unit):
+    """Количество в канонической единице в удобном для чтения виде."""
+    if unit in DISPLAY:
+        larger, factor = DISPLAY[unit]
+        if amount >= factor:
+            amount, unit = amount / factor, larger
+    amount = round(amount, 2)
+    if amount == int(amount):
+        amount = int(amount)
+    return amount, unit
@@ -3,8 +3,9 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
 
-from .views import (IngredientViewSet, Logout, ObtainAuthToken, RecipeViewSet,
-                    TagViewSet, UserViewSet)
+from .views import (EventTicket, IngredientViewSet, JobViewSet, Logout,
+                    MealPlanEntryViewSet, MealPlanViewSet, ObtainAuthToken,
+                    RecipeViewSet, TagViewSet, UserViewSet)
 
 router = DefaultRouter()
 
@@ -12,11 +13,16 @@ router.register('recipes', RecipeViewSet)
 router.register('tags', TagViewSet)
 router.register('ingredients', IngredientViewSet)
 router.register('users', UserViewSet)
+router.register('jobs', JobViewSet, basename='jobs')
+router.register('meal-plans', MealPlanViewSet, basename='meal-plans')
+router.register(
+    'meal-plan-entries', MealPlanEntryViewSet, basename='meal-plan-entries')
 
 
 urlpatterns = [
     path('auth/token/login/', ObtainAuthToken.as_view(), name='get_token'),
     path('auth/token/logout/', Logout.as_view(), name='delete_token'),
+    path('events/ticket/', EventTicket.as_view(), name='events_ticket'),
     path('', include(router.urls)),
 ]
 
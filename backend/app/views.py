@@ -1,62 +1,239 @@
+from django.conf import settings
+from django.db.models import Count, Exists, Max, OuterRef
 from django.db.utils import IntegrityError
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, permissions, status, viewsets
+from rest_framework import (filters, permissions, serializers, status,
+                            viewsets)
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .deletion import delete_recipes_counted
+from .etags import (etag_condition, if_match_versions, page_state,
+                    rows_state, version_etag)
+from .events import make_ticket, publish
+from .exceptions import PreconditionFailed
+from .feed import (backfill_feed, drop_author, fan_out_recipe, feed_queryset,
+                   update_author_mode)
 from .filters import RecipeFilter
-from .mixins import UserModelMixin
-from .models import (Favorite, Ingredient, Recipe, Shopping, Subscribe, Tag,
-                     User)
-from .pagination import LimitPagination
+from .jobs import enqueue
+from .matching import match_recipes
+from .mixins import CatalogMixin, ReplicaReadMixin, UserModelMixin
+from .models import (Favorite, Ingredient, Job, MealPlanEntry, Recipe,
+                     Shopping, Subscribe, Tag, User)
+from .pagination import FeedPagination, LimitPagination
 from .permissions import AnonUserPermission, CurrentUserPermission
+from .throttling import LoginEmailThrottle, LoginIPThrottle
 from .serializers import (AddRecipeInShoppingSerializer, EmailTokenLogin,
                           FavoriteSerializer, IngredientSerializer,
+                          JobSerializer, MealPlanEntrySerializer,
+                          MealPlanSerializer, RecipeMatchSerializer,
                           RecipePostSerializer, RecipeSerializer,
-                          SetPasswordSerializer, ShoppingSerializer,
+                          SetPasswordSerializer,
                           SubscriptionsRecipesSerializer, TagSerializer,
-                          UserSerializer, UserWithRecipeSerializer)
+                          UserProfileSerializer, UserSerializer,
+                          UserWithRecipeSerializer)
+from .shopping import build_meal_plan_list, build_shopping_list
+from .similarity import recommended_ids, similar_ids
+from .stats import change_stats, recipe_added
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ReplicaReadMixin, CatalogMixin,
+                 viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None
+    catalog_name = 'tags'
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReplicaReadMixin, CatalogMixin,
+                        viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
+    throttle_scope = 'ingredients'
+    catalog_name = 'ingredients'
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = [CurrentUserPermission]
     pagination_class = LimitPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    throttle_scope = None
+    primary_actions = ('favorite', 'shopping_cart', 'download_shopping_cart')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve', 'cook', 'feed',
+                               'similar', 'recommendations'):
+            return queryset
+        queryset = queryset.defer('text', 'search_vector')
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        fields = self.get_serializer().fields
+        annotations = {}
+        if 'is_favorited' in fields:
+            annotations['is_favorited'] = Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')))
+        if 'is_in_shopping_cart' in fields:
+            annotations['is_in_shopping_cart'] = Exists(
+                Shopping.objects.filter(user=user, recipe=OuterRef('pk')))
+        if isinstance(fields.get('author'), UserSerializer):
+            annotations['is_author_subscribed'] = Exists(
+                Subscribe.objects.filter(
+                    user=user, author=OuterRef('author')))
+        return queryset.annotate(**annotations)
 
     def get_serializer_class(self):
         if self.action in ('create', 'update', 'partial_update'):
             return RecipePostSerializer
         return RecipeSerializer
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['if_match'] = if_match_versions(self.request)
+        return context
+
+    def get_list_state(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return page_state(self, queryset, 'pk', 'version', 'updated_at')
+
+    def get_object_state(self, request, *args, **kwargs):
+        try:
+            queryset = self.get_queryset().filter(pk=kwargs['pk'])
+            rows = rows_state(queryset, 'version', 'updated_at')
+        except ValueError:
+            return None
+        if not rows:
+            return None
+        return rows[0][0], rows
+
+    @etag_condition('get_list_state')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @etag_condition('get_object_state', versioned=True)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        response['ETag'] = version_etag(response.data['version'])
+        return response
+
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        recipe_added(recipe)
+        fan_out_recipe(recipe)
+        enqueue('refresh_similar', {'recipe_id': recipe.id})
+
+    def perform_update(self, serializer):
+        cooking_time = serializer.instance.cooking_time
+        recipe = serializer.save()
+        change_stats(
+            recipe.author_id,
+            cooking_time_total=recipe.cooking_time - cooking_time)
+        enqueue('refresh_similar', {'recipe_id': recipe.id})
+
+    def get_limit(self, request):
+        limit = request.query_params.get('limit', '')
+        if not limit.isdigit():
+            return settings.SIMILAR_RECIPES_COUNT
+        return min(int(limit), settings.SIMILAR_RECIPES_COUNT)
+
+    def ordered_response(self, ids):
+        recipes = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in ids if pk in recipes], many=True)
+        return Response(serializer.data)
+
+    def destroy(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        versions = if_match_versions(request)
+        if versions is not None and recipe.version not in versions:
+            raise PreconditionFailed()
+        links = recipe.favorites.count() + recipe.shoppings.count()
+        if links < settings.RECIPE_BACKGROUND_DELETE_THRESHOLD:
+            delete_recipes_counted(Recipe.objects.filter(pk=recipe.pk))
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        job = enqueue(
+            'delete_recipe', {'recipe_id': recipe.id}, user=request.user)
+        return Response(
+            JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
     @action(
-        methods=['get', 'delete'],
+        methods=['GET'],
+        detail=False,
+        permission_classes=[permissions.IsAuthenticated,],
+        pagination_class=FeedPagination)
+    def feed(self, request):
+        queryset = feed_queryset(
+            self.filter_queryset(self.get_queryset()), request.user)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        methods=['GET'],
         detail=True,
+        permission_classes=[permissions.AllowAny,])
+    def similar(self, request, pk):
+        recipe = get_object_or_404(Recipe, id=pk)
+        return self.ordered_response(
+            similar_ids(recipe.id, self.get_limit(request)))
+
+    @action(
+        methods=['GET'],
+        detail=False,
         permission_classes=[permissions.IsAuthenticated,])
+    def recommendations(self, request):
+        return self.ordered_response(
+            recommended_ids(request.user, self.get_limit(request)))
+
+    @action(
+        methods=['GET'],
+        detail=False,
+        permission_classes=[permissions.AllowAny,])
+    def cook(self, request):
+        ingredients = ','.join(request.query_params.getlist('ingredients'))
+        ingredient_ids = [item for item in ingredients.split(',') if item]
+        missing = request.query_params.get('missing', '0')
+        if (not ingredient_ids
+                or not all(item.isdigit() for item in ingredient_ids)
+                or not missing.isdigit()):
+            return Response(
+                data={'message': 'Укажите id ингредиентов и число '
+                                 'недостающих ингредиентов'},
+                status=status.HTTP_400_BAD_REQUEST)
+        queryset = match_recipes(
+            self.filter_queryset(self.get_queryset()),
+            ingredient_ids,
+            int(missing)
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = RecipeMatchSerializer(
+                page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
+        serializer = RecipeMatchSerializer(
+            queryset, many=True, context={'request': request})
+        return Response(serializer.data)
+
+    @action(
+        methods=['get', 'delete'],
+        detail=True,
+        permission_classes=[permissions.IsAuthenticated,],
+        throttle_scope='toggle')
     def favorite(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
 
@@ -68,6 +245,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 )
             except IntegrityError:
                 return Response(status=status.HTTP_400_BAD_REQUEST)
+            change_stats(recipe.author_id, favorites_count=1)
+            publish(request.user, 'favorite', recipe=recipe.id, active=True)
             serializer = FavoriteSerializer(favorite)
             return Response(data=serializer.data, status=status.HTTP_201_CREATED)
         elif request.method == 'DELETE':
@@ -79,6 +258,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
             except Favorite.DoesNotExist:
                 return Response(status=status.HTTP_400_BAD_REQUEST)
             favorite.delete()
+            change_stats(recipe.author_id, favorites_count=-1)
+            publish(request.user, 'favorite', recipe=recipe.id, active=False)
             return Response(status=status.HTTP_204_NO_CONTENT)
     
     @action(
@@ -86,25 +267,16 @@ class RecipeViewSet(viewsets.ModelViewSet):
         detail=False,
         permission_classes=[permissions.IsAuthenticated,])
     def download_shopping_cart(self, request):
-        queryset = request.user.shoppings.all()
-        serializer = ShoppingSerializer(queryset, many=True)
-        recipes, ingredients = [], {}
-        for recipe in serializer.data:
-            recipes.append(f'{recipe["name"]} - {recipe["cooking_time"]} мин.')
-            for ing in recipe['ingredients']:
-                if ing['name'] in ingredients:
-                    ingredients[ing['name']][0] += ing['amount']
-                else:
-                    ingredients[ing['name']] = [
-                        ing['amount'], ing['measurement_unit']
-                    ]
-        nl = '\n'
-        ingredients = [
-            f'{key} - {value[0]} {value[1]}'
-            for key, value in ingredients.items()
-        ]
-        text = f'Рецепты:{nl}{nl.join(recipes)}{nl}' \
-               f'Ингредиенты:{nl}{nl.join(ingredients)}'
+        if request.query_params.get('async') in ('1', 'true'):
+            job = enqueue(
+                'shopping_list',
+                {'user_id': request.user.id},
+                user=request.user,
+                priority=10
+            )
+            return Response(
+                JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+        text = build_shopping_list(request.user)
         return HttpResponse(text, headers={
             'Content-Type': 'plain/text',
             'Content-Disposition': 'attachment; filename="file.txt"',
@@ -113,7 +285,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         methods=['GET', 'DELETE'],
         detail=True,
-        permission_classes=[permissions.IsAuthenticated,])
+        permission_classes=[permissions.IsAuthenticated,],
+        throttle_scope='toggle')
     def shopping_cart(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
 
@@ -125,6 +298,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 )
             except IntegrityError:
                 return Response(status=status.HTTP_400_BAD_REQUEST)
+            publish(
+                request.user, 'shopping_cart', recipe=recipe.id, active=True)
             serializer = AddRecipeInShoppingSerializer(shopping)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         elif request.method == 'DELETE':
@@ -136,21 +311,143 @@ class RecipeViewSet(viewsets.ModelViewSet):
             except Shopping.DoesNotExist:
                 return Response(status=status.HTTP_400_BAD_REQUEST)
             shopping.delete()
+            publish(
+                request.user, 'shopping_cart', recipe=recipe.id, active=False)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated,]
+    pagination_class = LimitPagination
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+
+class MealPlanViewSet(viewsets.ModelViewSet):
+    serializer_class = MealPlanSerializer
+    permission_classes = [permissions.IsAuthenticated,]
+    pagination_class = LimitPagination
+
+    def get_queryset(self):
+        return self.request.user.meal_plans.all()
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(methods=['GET'], detail=True)
+    def download_shopping_list(self, request, pk):
+        plan = self.get_object()
+        date = serializers.DateField()
+        params = request.query_params
+        start, end = (
+            date.run_validation(params[name]) if params.get(name) else None
+            for name in ('start', 'end')
+        )
+        text = build_meal_plan_list(plan, start, end)
+        return HttpResponse(text, headers={
+            'Content-Type': 'plain/text',
+            'Content-Disposition': 'attachment; filename="file.txt"',
+            })
+
+
+class MealPlanEntryViewSet(viewsets.ModelViewSet):
+    serializer_class = MealPlanEntrySerializer
+    permission_classes = [permissions.IsAuthenticated,]
+    pagination_class = LimitPagination
+
+    def get_queryset(self):
+        entries = MealPlanEntry.objects.filter(
+            plan__user=self.request.user).select_related('plan')
+        params = self.request.query_params
+        if params.get('plan', '').isdigit():
+            entries = entries.filter(plan=params['plan'])
+        return entries
+
+    def perform_create(self, serializer):
+        serializer.save().plan.bump_version()
+
+    def perform_update(self, serializer):
+        previous = serializer.instance.plan
+        entry = serializer.save()
+        if previous.pk != entry.plan_id:
+            previous.bump_version()
+        entry.plan.bump_version()
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        instance.plan.bump_version()
+
+
 # Пользователи и токены
-class UserViewSet(UserModelMixin):
+USER_STATE_FIELDS = (
+    'pk', 'email', 'username', 'first_name', 'last_name',
+    'stats__recipes_count', 'stats__followers_count',
+    'stats__favorites_count', 'stats__cooking_time_total',
+)
+
+
+class UserViewSet(ReplicaReadMixin, UserModelMixin):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.AllowAny,]
     pagination_class = LimitPagination
+    throttle_scope = None
+    primary_actions = ('subscribe',)
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('stats')
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve', 'me'):
+            return UserProfileSerializer
+        return UserSerializer
+
+    def get_state_queryset(self):
+        queryset = self.get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(is_subscribed=Exists(
+            Subscribe.objects.filter(user=user, author=OuterRef('pk'))))
+
+    def get_list_state(self, request, *args, **kwargs):
+        return page_state(self, self.get_state_queryset(), *USER_STATE_FIELDS)
+
+    def get_object_state(self, request, *args, **kwargs):
+        try:
+            queryset = self.get_state_queryset().filter(pk=kwargs['pk'])
+            return rows_state(queryset, *USER_STATE_FIELDS) or None
+        except ValueError:
+            return None
+
+    def get_me_state(self, request):
+        return rows_state(
+            User.objects.filter(pk=request.user.pk), *USER_STATE_FIELDS)
+
+    def get_subscriptions_state(self, request):
+        queryset = request.user.subscribers.annotate(
+            recipes_count=Count('author__recipes'),
+            recipes_updated=Max('author__recipes__updated_at'))
+        return page_state(
+            self, queryset,
+            *(f'author__{field}' for field in USER_STATE_FIELDS))
+
+    @etag_condition('get_list_state')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @etag_condition('get_object_state')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(
         methods=['GET'],
         detail=False,
         permission_classes=[permissions.IsAuthenticated,])
+    @etag_condition('get_me_state')
     def me(self, request):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
@@ -178,8 +475,9 @@ class UserViewSet(UserModelMixin):
         methods=['GET'],
         detail=False,
         permission_classes=[permissions.IsAuthenticated,])
+    @etag_condition('get_subscriptions_state')
     def subscriptions(self, request):
-        users = request.user.subscribers.all()
+        users = request.user.subscribers.select_related('author__stats')
         recipes_limit = request.GET.get('recipes_limit', '')
         serializer = SubscriptionsRecipesSerializer(
             users,
@@ -201,7 +499,8 @@ class UserViewSet(UserModelMixin):
     @action(
         methods=['GET', 'DELETE'],
         detail=True,
-        permission_classes=[permissions.IsAuthenticated,])
+        permission_classes=[permissions.IsAuthenticated,],
+        throttle_scope='toggle')
     def subscribe(self, request, pk):
         author = get_object_or_404(User, id=pk)
         recipes_limit = request.query_params.get('recipes_limit', '')
@@ -211,6 +510,10 @@ class UserViewSet(UserModelMixin):
                 Subscribe.objects.create(user=request.user, author=author)
             except IntegrityError:
                 return Response(status=status.HTTP_400_BAD_REQUEST)
+            change_stats(author.id, followers_count=1)
+            update_author_mode(author.id)
+            backfill_feed(request.user, author)
+            publish(request.user, 'subscribe', author=author.id, active=True)
             serializer = UserWithRecipeSerializer(
                 author,
                 context={'request': request}
@@ -231,11 +534,16 @@ class UserViewSet(UserModelMixin):
             except Subscribe.DoesNotExist:
                 return Response(status=status.HTTP_400_BAD_REQUEST)
             subscribe.delete()
+            change_stats(author.id, followers_count=-1)
+            update_author_mode(author.id)
+            drop_author(request.user, author)
+            publish(request.user, 'subscribe', author=author.id, active=False)
             return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class ObtainAuthToken(APIView):
     permission_classes = [AnonUserPermission,]
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
     def post(self, request):
         serializer = EmailTokenLogin(data=request.data)
@@ -256,6 +564,14 @@ class ObtainAuthToken(APIView):
         return Response(content)
 
 
+class EventTicket(APIView):
+    """Билет для подключения к потоку /api/events/ через EventSource."""
+    permission_classes = [permissions.IsAuthenticated,]
+
+    def post(self, request):
+        return Response({'ticket': make_ticket(request.user)})
+
+
 class Logout(APIView):
     def post(self, request):
         request.user.auth_token.delete()
@@ -19,11 +19,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'app',
     'rest_framework',
     'django_filters',
     'rest_framework.authtoken',
-    'djoser',
 ]
 
 REST_FRAMEWORK = {
@@ -33,14 +33,60 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'app.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 1,
     'SEARCH_PARAM': 'name',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'app.throttling.UserBucketThrottle',
+        'app.throttling.AnonBucketThrottle',
+        'app.throttling.ScopedBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '600/min',
+        'anon': '300/min',
+        'login': '20/min',
+        'login_email': '5/min',
+        'toggle': '60/min',
+        'ingredients': '120/min',
+    },
+    'NUM_PROXIES': 1,
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', default='foodgram'),
+    },
+    # Лимиты запросов должны быть общими для всех воркеров gunicorn,
+    # поэтому по умолчанию хранятся в таблице основной базы.
+    'throttle': {
+        'BACKEND': os.environ.get(
+            'THROTTLE_CACHE_BACKEND',
+            default='django.core.cache.backends.db.DatabaseCache'
+        ),
+        'LOCATION': os.environ.get(
+            'THROTTLE_CACHE_LOCATION', default='throttle_cache'),
+    },
 }
 
+THROTTLE_CACHE = 'throttle'
+
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'app.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -81,6 +127,23 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: DB_REPLICAS=host1,host2:5433
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+        filter(None, os.environ.get('DB_REPLICAS', '').split(',')), 1):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['app.routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = int(
+    os.environ.get('REPLICA_STICKY_SECONDS', default=10))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -116,3 +179,37 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+FEED_FANOUT_LIMIT = int(os.environ.get('FEED_FANOUT_LIMIT', default=1000))
+FEED_BACKFILL_SIZE = int(os.environ.get('FEED_BACKFILL_SIZE', default=50))
+
+RECIPE_BACKGROUND_DELETE_THRESHOLD = int(
+    os.environ.get('RECIPE_BACKGROUND_DELETE_THRESHOLD', default=1000))
+SIMILAR_RECIPES_COUNT = int(
+    os.environ.get('SIMILAR_RECIPES_COUNT', default=20))
+DELETE_CHUNK_SIZE = int(os.environ.get('DELETE_CHUNK_SIZE', default=1000))
+
+COMPRESSION_MIN_SIZE = int(
+    os.environ.get('COMPRESSION_MIN_SIZE', default=1024))
+COMPRESSION_CONTENT_TYPES = (
+    'application/json',
+    'application/javascript',
+    'text/',
+)
+CATALOG_CACHE_TIMEOUT = int(
+    os.environ.get('CATALOG_CACHE_TIMEOUT', default=300))
+
+ADMIN_EXACT_COUNT_LIMIT = int(
+    os.environ.get('ADMIN_EXACT_COUNT_LIMIT', default=10000))
+
+SHOPPING_ARCHIVE_DAYS = int(
+    os.environ.get('SHOPPING_ARCHIVE_DAYS', default=365))
+
+MEAL_PLAN_CACHE_TIMEOUT = int(
+    os.environ.get('MEAL_PLAN_CACHE_TIMEOUT', default=3600))
+
+# Без значения брокер выбирается по базе: PostgresBroker для PostgreSQL
+EVENTS_BROKER = os.environ.get('EVENTS_BROKER')
+EVENTS_KEEPALIVE = int(os.environ.get('EVENTS_KEEPALIVE', default=15))
+EVENTS_TICKET_MAX_AGE = int(
+    os.environ.get('EVENTS_TICKET_MAX_AGE', default=60))
@@ -0,0 +1,29 @@
+import gc
+import multiprocessing
+import os
+
+bind = '0.0.0.0:8000'
+workers = int(os.environ.get(
+    'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Приложение импортируется один раз в мастере, воркеры получают его
+# после fork и делят память с мастером, пока не изменят страницы.
+preload_app = True
+
+
+def when_ready(server):
+    # Загружаем urls, представления и сериализаторы до fork, а затем
+    # убираем уже созданные объекты из-под сборщика мусора, чтобы его
+    # проходы в воркерах не копировали общие страницы.
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Соединения с базой, открытые в мастере, не должны делиться
+    # между процессами.
+    from django.db import connections
+
+    connections.close_all()
@@ -0,0 +1,15 @@
+"""Нагрузочное тестирование API смесью взвешенных сценариев.
+
+Запускается из каталога backend:
+
+    python -m loadtest run --serve sqlite --users 20 --duration 60 \
+        --output report.json
+    python -m loadtest run --host http://localhost:8000 \
+        --data seed.json --mix read
+    python -m loadtest compare base.json report.json --threshold 10
+
+Раннер использует только стандартную библиотеку и не импортирует
+Django, поэтому не отнимает процессор у проверяемого сервера больше,
+чем нужно для запросов. Данные для сценариев (токены, id рецептов,
+пользователей и ингредиентов) готовит команда seed_loadtest.
+"""
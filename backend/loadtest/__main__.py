@@ -0,0 +1,134 @@
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+
+from . import report, runner
+from .scenarios import MIXES, SCENARIOS
+
+
+def parse_weights(values):
+    weights = {}
+    for value in values:
+        name, _, weight = value.partition('=')
+        if not weight.isdigit():
+            raise argparse.ArgumentTypeError(
+                f'Ожидается сценарий=вес, получено {value}')
+        weights[name] = int(weight)
+    return weights
+
+
+def run(options):
+    weights = {**MIXES[options.mix], **parse_weights(options.weight)}
+    weights = {name: weight for name, weight in weights.items() if weight}
+    runner.check_weights(weights)
+    meta = {
+        'started': datetime.now(timezone.utc).isoformat(),
+        'mix': options.mix,
+        'weights': weights,
+        'users': options.users,
+        'duration': options.duration,
+        'ramp_up': options.ramp_up,
+        'think_time': options.think_time,
+        'seed': options.seed,
+    }
+    if options.serve:
+        from .stack import LocalStack
+
+        with LocalStack(
+                options.serve, options.workers, options.seed_users,
+                options.seed_recipes, options.seed) as stack:
+            meta.update(host=stack.host, serve=options.serve,
+                        workers=options.workers)
+            samples, elapsed = runner.run(
+                stack.host, stack.data, weights, options.users,
+                options.duration, options.ramp_up, options.think_time,
+                options.seed, options.timeout)
+    else:
+        with open(options.data) as data_file:
+            data = json.load(data_file)
+        meta['host'] = options.host
+        samples, elapsed = runner.run(
+            options.host, data, weights, options.users, options.duration,
+            options.ramp_up, options.think_time, options.seed,
+            options.timeout)
+    result = report.build_report(samples, elapsed, meta)
+    print(report.format_report(result))
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(result, output, ensure_ascii=False, indent=2)
+    return 0
+
+
+def compare(options):
+    with open(options.base) as base, open(options.current) as current:
+        rows, regressions = report.compare(
+            json.load(base), json.load(current), options.threshold,
+            options.min_requests)
+    print(report.format_comparison(rows))
+    for regression in regressions:
+        print(f'ухудшение: {regression}')
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadtest')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Провести прогон')
+    target = run_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--host', help='Адрес работающего API')
+    target.add_argument(
+        '--serve', choices=('sqlite', 'postgres'),
+        help='Поднять локальный gunicorn с этой базой')
+    run_parser.add_argument(
+        '--data', help='JSON из manage.py seed_loadtest, нужен с --host')
+    run_parser.add_argument('--users', type=int, default=10)
+    run_parser.add_argument(
+        '--duration', type=float, default=60, help='Секунды после разгона')
+    run_parser.add_argument('--ramp-up', type=float, default=0)
+    run_parser.add_argument(
+        '--think-time', type=float, default=0,
+        help='Средняя пауза между сценариями, секунды')
+    run_parser.add_argument('--mix', choices=sorted(MIXES), default='default')
+    run_parser.add_argument(
+        '--weight', action='append', default=[], metavar='СЦЕНАРИЙ=ВЕС',
+        help='Изменить вес сценария в смеси, 0 отключает')
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--timeout', type=float, default=30)
+    run_parser.add_argument('--output', help='Сохранить отчёт в JSON')
+    run_parser.add_argument('--workers', type=int, default=2)
+    run_parser.add_argument('--seed-users', type=int, default=50)
+    run_parser.add_argument('--seed-recipes', type=int, default=500)
+
+    compare_parser = commands.add_parser(
+        'compare', help='Сравнить два отчёта')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument(
+        '--threshold', type=float, default=10,
+        help='Допустимое ухудшение, проценты')
+    compare_parser.add_argument(
+        '--min-requests', type=int, default=20,
+        help='Не проверять запросы с меньшим числом замеров')
+
+    commands.add_parser('scenarios', help='Показать сценарии и смеси')
+
+    options = parser.parse_args(argv)
+    if options.command == 'run':
+        if options.host and not options.data:
+            parser.error('с --host нужен --data')
+        try:
+            return run(options)
+        except (ValueError, argparse.ArgumentTypeError) as error:
+            parser.error(str(error))
+    if options.command == 'compare':
+        return compare(options)
+    print('сценарии:', ', '.join(sorted(SCENARIOS)))
+    for name, weights in MIXES.items():
+        print(f'{name}: {weights}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import gzip
+import json
+import threading
+import time
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+
+class Recorder:
+    """Собирает результаты запросов всех виртуальных пользователей."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = []
+
+    def add(self, name, elapsed, status, ok):
+        with self.lock:
+            self.samples.append((name, elapsed, status, ok))
+
+
+class Client:
+    """HTTP-клиент одного виртуального пользователя.
+
+    Запрос записывается под именем из метода и шаблона пути, например
+    GET /api/recipes/{id}/, чтобы разные id попадали в одну строку отчёта.
+    """
+
+    def __init__(self, host, token, recorder, timeout=30):
+        self.host = host.rstrip('/')
+        self.token = token
+        self.recorder = recorder
+        self.timeout = timeout
+
+    def get(self, template, query=None, expect=(200,), **params):
+        return self.request('GET', template, query, expect, **params)
+
+    def delete(self, template, query=None, expect=(204,), **params):
+        return self.request('DELETE', template, query, expect, **params)
+
+    def request(self, method, template, query=None, expect=(200,),
+                **params):
+        path = template.format(**params)
+        if query:
+            path = f'{path}?{urlencode(query, doseq=True)}'
+        request = Request(self.host + path, method=method, headers={
+            'Authorization': f'Token {self.token}',
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip',
+        })
+        started = time.perf_counter()
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                status = response.status
+                body = response.read()
+                encoding = response.headers.get('Content-Encoding')
+        except HTTPError as error:
+            status, body, encoding = error.code, error.read(), None
+        except (URLError, OSError):
+            status, body, encoding = 0, b'', None
+        elapsed = (time.perf_counter() - started) * 1000
+        ok = status in expect
+        self.recorder.add(f'{method} {template}', elapsed, status, ok)
+        return Response(status, body, encoding, ok)
+
+
+class Response:
+
+    def __init__(self, status, body, encoding, ok):
+        self.status = status
+        self.body = body
+        self.encoding = encoding
+        self.ok = ok
+
+    def json(self):
+        body = self.body
+        if self.encoding == 'gzip':
+            body = gzip.decompress(body)
+        return json.loads(body)
@@ -0,0 +1,129 @@
+import math
+from collections import Counter, defaultdict
+
+PERCENTILES = (50, 90, 99)
+# Задержки, рост которых считается ухудшением.
+LATENCY_KEYS = ('p50', 'p90', 'p99')
+
+
+def percentile(values, q):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    if not values:
+        return 0
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample[1] for sample in samples)
+    errors = sum(1 for sample in samples if not sample[3])
+    count = len(samples)
+    summary = {
+        'requests': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0,
+        'rps': round(count / elapsed, 2) if elapsed else 0,
+        'mean': round(sum(latencies) / count, 2) if count else 0,
+        'max': round(latencies[-1], 2) if count else 0,
+    }
+    for q in PERCENTILES:
+        summary[f'p{q}'] = round(percentile(latencies, q), 2)
+    return summary
+
+
+def build_report(samples, elapsed, meta):
+    """Отчёт прогона: итог, строки по запросам и коды ошибок.
+
+    Задержки в миллисекундах, пропускная способность в запросах
+    в секунду за всё время прогона вместе с разгоном.
+    """
+    by_name = defaultdict(list)
+    statuses = defaultdict(Counter)
+    for sample in samples:
+        by_name[sample[0]].append(sample)
+        if not sample[3]:
+            statuses[sample[0]][str(sample[2])] += 1
+    return {
+        'meta': {**meta, 'elapsed': round(elapsed, 2)},
+        'total': summarize(samples, elapsed),
+        'endpoints': {
+            name: summarize(rows, elapsed)
+            for name, rows in sorted(by_name.items())
+        },
+        'errors': {name: dict(codes) for name, codes in statuses.items()},
+    }
+
+
+def change(old, new):
+    if not old:
+        return None
+    return round((new - old) / old * 100, 1)
+
+
+def compare(base, current, threshold=10, min_requests=20):
+    """Сравнивает два отчёта и возвращает строки и список ухудшений.
+
+    Ухудшение: рост любой задержки или падение rps больше чем на
+    threshold процентов либо рост доли ошибок. Запросы, у которых
+    в одном из отчётов меньше min_requests замеров, только выводятся:
+    их перцентили слишком шумные. Итог проверяется всегда.
+    """
+    rows, regressions = [], []
+    names = ['total'] + sorted(
+        set(base['endpoints']) | set(current['endpoints']))
+    for name in names:
+        old = base['total'] if name == 'total' else base['endpoints'].get(name)
+        new = (current['total'] if name == 'total'
+               else current['endpoints'].get(name))
+        if old is None or new is None:
+            rows.append((name, None))
+            continue
+        deltas = {
+            key: change(old[key], new[key])
+            for key in ('rps', *LATENCY_KEYS)
+        }
+        rows.append((name, {'old': old, 'new': new, 'deltas': deltas}))
+        if name != 'total' and min(
+                old['requests'], new['requests']) < min_requests:
+            continue
+        for key in LATENCY_KEYS:
+            if deltas[key] is not None and deltas[key] > threshold:
+                regressions.append(f'{name}: {key} +{deltas[key]}%')
+        if deltas['rps'] is not None and deltas['rps'] < -threshold:
+            regressions.append(f'{name}: rps {deltas["rps"]}%')
+        if new['error_rate'] > old['error_rate']:
+            regressions.append(
+                f'{name}: ошибки {old["error_rate"]} -> {new["error_rate"]}')
+    return rows, regressions
+
+
+def format_report(report):
+    lines = [
+        f'{"запрос":<45} {"всего":>7} {"ошибки":>7} {"rps":>8} '
+        f'{"p50":>8} {"p90":>8} {"p99":>8}'
+    ]
+    rows = list(report['endpoints'].items()) + [('итого', report['total'])]
+    for name, row in rows:
+        lines.append(
+            f'{name:<45} {row["requests"]:>7} {row["errors"]:>7} '
+            f'{row["rps"]:>8} {row["p50"]:>8} {row["p90"]:>8} '
+            f'{row["p99"]:>8}'
+        )
+    for name, codes in report['errors'].items():
+        lines.append(f'ошибки {name}: {codes}')
+    return '\n'.join(lines)
+
+
+def format_comparison(rows):
+    lines = [f'{"запрос":<45} ' + ' '.join(
+        f'{key:>16}' for key in ('rps', *LATENCY_KEYS))]
+    for name, row in rows:
+        if row is None:
+            lines.append(f'{name:<45} есть только в одном отчёте')
+            continue
+        cells = []
+        for key in ('rps', *LATENCY_KEYS):
+            delta = row['deltas'][key]
+            delta = '' if delta is None else f'{delta:+}%'
+            cells.append(f'{row["new"][key]:>8} {delta:>7}')
+        lines.append(f'{name:<45} ' + ' '.join(cells))
+    return '\n'.join(lines)
@@ -0,0 +1,55 @@
+import random
+import threading
+import time
+
+from .client import Client, Recorder
+from .scenarios import SCENARIOS
+
+
+def virtual_user(client, data, weights, rng, deadline, think_time):
+    names, values = zip(*weights.items())
+    while time.monotonic() < deadline:
+        SCENARIOS[rng.choices(names, values)[0]](client, data, rng)
+        if think_time:
+            time.sleep(rng.uniform(0, 2 * think_time))
+
+
+def check_weights(weights):
+    unknown = set(weights) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(
+            f'Неизвестные сценарии: {", ".join(sorted(unknown))}')
+    if not weights:
+        raise ValueError('В смеси не осталось сценариев')
+
+
+def run(host, data, weights, users=10, duration=60, ramp_up=0,
+        think_time=0, seed=1, timeout=30):
+    """Гоняет сценарии users потоками и возвращает записи и время.
+
+    Потоки запускаются равномерно за ramp_up секунд, у каждого свой
+    токен из data['tokens'] по кругу и свой генератор случайных чисел,
+    поэтому с тем же seed последовательность сценариев повторяется.
+    """
+    check_weights(weights)
+    recorder = Recorder()
+    started = time.monotonic()
+    deadline = started + ramp_up + duration
+    threads = []
+    for number in range(users):
+        client = Client(
+            host, data['tokens'][number % len(data['tokens'])], recorder,
+            timeout)
+        thread = threading.Thread(
+            target=virtual_user,
+            args=(client, data, weights, random.Random(seed + number),
+                  deadline, think_time),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+        if ramp_up and number < users - 1:
+            time.sleep(ramp_up / users)
+    for thread in threads:
+        thread.join()
+    return recorder.samples, time.monotonic() - started
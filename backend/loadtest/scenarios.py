@@ -0,0 +1,130 @@
+"""Сценарии виртуальных пользователей и их смеси.
+
+Сценарий получает клиента, данные из seed_loadtest и генератор
+случайных чисел пользователя. Переключатели (избранное, покупки,
+подписки) ожидают и успешный ответ, и 400 для уже выполненного
+действия: состояние базы между прогонами не сбрасывается.
+"""
+import math
+
+SCENARIOS = {}
+
+PAGE_SIZE = 6
+
+INGREDIENT_PREFIXES = ('мук', 'мол', 'яй', 'сах', 'сол', 'мас', 'лук', 'ка')
+
+
+def scenario(function):
+    SCENARIOS[function.__name__] = function
+    return function
+
+
+@scenario
+def browse_recipes(client, data, rng):
+    pages = max(1, math.ceil(len(data['recipes']) / PAGE_SIZE))
+    client.get(
+        '/api/recipes/', {'page': rng.randint(1, pages), 'limit': PAGE_SIZE})
+
+
+@scenario
+def filter_by_tags(client, data, rng):
+    tags = rng.sample(data['tags'], rng.randint(1, len(data['tags'])))
+    client.get('/api/recipes/', {'tags': tags, 'limit': PAGE_SIZE})
+
+
+@scenario
+def view_recipe(client, data, rng):
+    client.get('/api/recipes/{id}/', id=rng.choice(data['recipes']))
+
+
+@scenario
+def browse_feed(client, data, rng):
+    client.get('/api/recipes/feed/', {'limit': PAGE_SIZE})
+
+
+@scenario
+def search_ingredients(client, data, rng):
+    client.get('/api/ingredients/', {'name': rng.choice(INGREDIENT_PREFIXES)})
+
+
+@scenario
+def list_tags(client, data, rng):
+    client.get('/api/tags/')
+
+
+@scenario
+def view_user(client, data, rng):
+    client.get('/api/users/{id}/', id=rng.choice(data['users']))
+
+
+@scenario
+def subscriptions(client, data, rng):
+    client.get(
+        '/api/users/subscriptions/', {'limit': PAGE_SIZE, 'recipes_limit': 3})
+
+
+@scenario
+def toggle_favorite(client, data, rng):
+    recipe = rng.choice(data['recipes'])
+    client.get('/api/recipes/{id}/favorite/', expect=(201, 400), id=recipe)
+    client.delete(
+        '/api/recipes/{id}/favorite/', expect=(204, 400), id=recipe)
+
+
+@scenario
+def toggle_shopping_cart(client, data, rng):
+    recipe = rng.choice(data['recipes'])
+    client.get(
+        '/api/recipes/{id}/shopping_cart/', expect=(201, 400), id=recipe)
+    client.delete(
+        '/api/recipes/{id}/shopping_cart/', expect=(204, 400), id=recipe)
+
+
+@scenario
+def download_shopping_cart(client, data, rng):
+    recipe = rng.choice(data['recipes'])
+    client.get(
+        '/api/recipes/{id}/shopping_cart/', expect=(201, 400), id=recipe)
+    client.get('/api/recipes/download_shopping_cart/')
+
+
+@scenario
+def toggle_subscription(client, data, rng):
+    author = rng.choice(data['users'])
+    client.get(
+        '/api/users/{id}/subscribe/', expect=(201, 400), id=author)
+    client.delete(
+        '/api/users/{id}/subscribe/', expect=(204, 400), id=author)
+
+
+MIXES = {
+    'default': {
+        'browse_recipes': 25,
+        'filter_by_tags': 15,
+        'view_recipe': 20,
+        'browse_feed': 10,
+        'search_ingredients': 8,
+        'list_tags': 3,
+        'view_user': 3,
+        'subscriptions': 3,
+        'toggle_favorite': 5,
+        'toggle_shopping_cart': 4,
+        'download_shopping_cart': 2,
+        'toggle_subscription': 2,
+    },
+    'read': {
+        'browse_recipes': 30,
+        'filter_by_tags': 20,
+        'view_recipe': 25,
+        'browse_feed': 10,
+        'search_ingredients': 10,
+        'view_user': 5,
+    },
+    'write': {
+        'view_recipe': 20,
+        'toggle_favorite': 30,
+        'toggle_shopping_cart': 25,
+        'download_shopping_cart': 10,
+        'toggle_subscription': 15,
+    },
+}
@@ -0,0 +1,38 @@
+"""Настройки локального стенда для python -m loadtest run --serve.
+
+С LOADTEST_SQLITE база заменяется файлом SQLite, с LOADTEST_DB_NAME
+используется временная база с этим именем на сервере из переменных
+DB_*. Лимиты запросов поднимаются, чтобы виртуальные пользователи
+с одним токеном не получали 429, а сама проверка лимитов оставалась
+в замерах.
+"""
+import os
+
+from foodgram import settings as base
+from foodgram.settings import *  # noqa: F401,F403
+
+if os.environ.get('LOADTEST_SQLITE'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ['LOADTEST_SQLITE'],
+            'OPTIONS': {'timeout': 30},
+        }
+    }
+    DATABASE_REPLICAS = []
+elif os.environ.get('LOADTEST_DB_NAME'):
+    DATABASES = {
+        'default': {
+            **base.DATABASES['default'],
+            'NAME': os.environ['LOADTEST_DB_NAME'],
+        }
+    }
+    DATABASE_REPLICAS = []
+
+REST_FRAMEWORK = {
+    **base.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {
+        scope: '1000000/min'
+        for scope in base.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+    },
+}
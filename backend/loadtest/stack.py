@@ -0,0 +1,124 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from urllib.error import URLError
+from urllib.request import urlopen
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SETTINGS = 'loadtest.settings'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class LocalStack:
+    """Локальный gunicorn с подготовленной базой на время прогона.
+
+    database='sqlite' создаёт временный файл базы, 'postgres' создаёт
+    временную базу на сервере из переменных DB_*, не трогая базу
+    DB_NAME. После прогона временная база удаляется.
+    """
+
+    def __init__(self, database='sqlite', workers=2, users=50, recipes=500,
+                 seed=1):
+        self.database = database
+        self.workers = workers
+        self.seed_args = [
+            '--users', str(users), '--recipes', str(recipes),
+            '--seed', str(seed),
+        ]
+        self.process = None
+        self.database_name = None
+
+    def __enter__(self):
+        self.tmp = tempfile.TemporaryDirectory(prefix='loadtest-')
+        self.env = {**os.environ, 'DJANGO_SETTINGS_MODULE': SETTINGS}
+        if self.database == 'sqlite':
+            self.env['LOADTEST_SQLITE'] = str(
+                Path(self.tmp.name) / 'db.sqlite3')
+        else:
+            self.database_name = f'loadtest_{uuid.uuid4().hex[:12]}'
+            self.execute_postgres(f'CREATE DATABASE {self.database_name}')
+            self.env['LOADTEST_DB_NAME'] = self.database_name
+        data_path = Path(self.tmp.name) / 'seed.json'
+        try:
+            self.manage('migrate', '--noinput', '-v', '0')
+            self.manage(
+                'seed_loadtest', *self.seed_args, '--output', str(data_path),
+                '--i-know-this-is-not-production')
+            self.data = json.loads(data_path.read_text())
+            port = free_port()
+            self.host = f'http://127.0.0.1:{port}'
+            self.process = subprocess.Popen(
+                [
+                    sys.executable, '-m', 'gunicorn',
+                    '-c', 'gunicorn.conf.py',
+                    '--bind', f'127.0.0.1:{port}',
+                    '--workers', str(self.workers),
+                    'foodgram.wsgi:application',
+                ],
+                cwd=BACKEND_DIR, env=self.env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            self.wait_ready()
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.database_name is not None:
+            self.execute_postgres(
+                f'DROP DATABASE IF EXISTS {self.database_name}')
+        self.tmp.cleanup()
+
+    def execute_postgres(self, statement):
+        """Выполняет команду на служебной базе сервера из переменных DB_*."""
+        import psycopg2
+
+        connection = psycopg2.connect(
+            dbname='postgres',
+            user=os.environ.get('POSTGRES_USER', 'default'),
+            password=os.environ.get('POSTGRES_PASSWORD', 'default'),
+            host=os.environ.get('DB_HOST', 'default'),
+            port=os.environ.get('DB_PORT', 5432),
+        )
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(statement)
+        finally:
+            connection.close()
+
+    def manage(self, *args):
+        subprocess.run(
+            [sys.executable, 'manage.py', *args],
+            cwd=BACKEND_DIR, env=self.env, check=True)
+
+    def wait_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError('gunicorn завершился при запуске')
+            try:
+                with urlopen(f'{self.host}/api/tags/', timeout=2):
+                    return
+            except (URLError, OSError):
+                time.sleep(0.3)
+        raise RuntimeError('gunicorn не ответил за отведённое время')